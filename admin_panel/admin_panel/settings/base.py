@@ -106,6 +106,33 @@ else:
         log_dir = ".." / log_dir
     log_dir.mkdir(exist_ok=True)
 
+# Local cache (rendered cards, etc.)
+if env_cache_dir := os.environ.get("BALLSDEX_CACHE_DIR"):
+    CACHE_DIR = pathlib.Path(env_cache_dir)
+else:
+    CACHE_DIR = pathlib.Path("./cache")
+    if pathlib.Path("./manage.py").exists():
+        CACHE_DIR = ".." / CACHE_DIR
+
+# The memory limits of the card caches below are per process: the bot, the admin panel and each
+# of the card render workers (see the `card_render_workers` setting) have their own caches. With the
+# defaults, expect up to about 200 MiB per process, times the number of workers plus two.
+# Maximum size in bytes of the rendered cards kept in memory, the rest stays on disk
+CARD_CACHE_MEMORY_SIZE = 32 * 1024 * 1024
+# Maximum size in bytes of the rendered cards kept on disk, the least recently used are deleted
+CARD_CACHE_DISK_SIZE = 2 * 1024 * 1024 * 1024
+# Maximum size in bytes of the decoded base cards (without stats) kept in memory, by each render worker
+CARD_TEMPLATE_CACHE_MEMORY_SIZE = 64 * 1024 * 1024
+# Maximum size in bytes of the base cards kept on disk
+CARD_TEMPLATE_CACHE_DISK_SIZE = 1024 * 1024 * 1024
+# Maximum size in bytes of the decoded source images (backgrounds, artworks, icons) kept in memory,
+# by each render worker
+CARD_ASSET_CACHE_MEMORY_SIZE = 64 * 1024 * 1024
+# Maximum size in bytes of the pre-rasterised card text (titles, abilities) kept in memory
+CARD_TEXT_CACHE_MEMORY_SIZE = 32 * 1024 * 1024
+# Maximum size in bytes of the spawn images kept in memory, only by the bot process
+WILD_CARD_STORE_MEMORY_SIZE = 128 * 1024 * 1024
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
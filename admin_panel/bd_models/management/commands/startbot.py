@@ -34,6 +34,7 @@ class CLIFlags(TypedDict):
     disable_message_content: bool
     disable_time_check: bool
     skip_tree_sync: bool
+    prerender_cards: bool
     debug: bool
     dev: bool
 
@@ -261,9 +262,14 @@ class Command(BaseCommand):
         parser.add_argument(
             "--skip-tree-sync",
             action="store_true",
-            help="Does not sync application commands to Discord. Significant startup speedup and "
-            "avoids ratelimits, but risks of having desynced commands after updates. This is "
-            "always enabled with clustering.",
+            help="Does not sync application commands to Discord, even if they changed since the last sync. "
+            "Commands are otherwise only synced when they change, by a single cluster.",
+        )
+        parser.add_argument(
+            "--prerender-cards",
+            action="store_true",
+            help="Draw the base card layer of every enabled ball and active special on startup, using every CPU "
+            "core. Slows down startup, but avoids slow card generation right after a deploy.",
         )
         parser.add_argument("--debug", action="store_true", help="Enable debug logs")
         parser.add_argument("--dev", action="store_true", help="Enable developer mode")
@@ -334,6 +340,7 @@ class Command(BaseCommand):
                 disable_message_content=options["disable_message_content"],
                 disable_time_check=options["disable_time_check"],
                 skip_tree_sync=options["skip_tree_sync"],
+                prerender_cards=options["prerender_cards"],
             )
 
             loop.run_until_complete(init_sentry())
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-17 11:48
+from typing import TYPE_CHECKING
+
+from django.db import migrations, models
+from PIL import Image, ImageStat
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def get_brightness(image: Image.Image) -> float:
+    # frozen copy of the image generator's computation, which may change after this migration
+    image = image.convert("RGBA")
+    region = image.crop((0, int(image.height * 0.8), image.width, image.height))
+    return ImageStat.Stat(region.convert("L")).mean[0]
+
+
+def compute_brightness(apps: "Apps", schema_editor: "BaseDatabaseSchemaEditor"):
+    for model_name in ("Regime", "Special"):
+        model = apps.get_model("bd_models", model_name)
+        for instance in model.objects.exclude(background__isnull=True).exclude(background=""):
+            try:
+                with Image.open(instance.background.path) as image:
+                    instance.background_brightness = get_brightness(image)
+            except OSError:
+                # missing file, will be computed on the next save
+                continue
+            instance.save(update_fields=("background_brightness",))
+
+
+class Migration(migrations.Migration):
+    dependencies = [("bd_models", "0014_alter_ball_options_alter_ballinstance_options_and_more")]
+
+    operations = [
+        migrations.AddField(
+            model_name="regime",
+            name="background_brightness",
+            field=models.FloatField(
+                editable=False, help_text="Brightness of the bottom of the background, computed on save", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="special",
+            name="background_brightness",
+            field=models.FloatField(
+                editable=False, help_text="Brightness of the bottom of the background, computed on save", null=True
+            ),
+        ),
+        migrations.RunPython(compute_brightness, reverse_code=migrations.RunPython.noop),
+    ]
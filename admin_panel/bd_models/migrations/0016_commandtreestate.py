@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("bd_models", "0015_regime_background_brightness_and_more")]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommandTreeState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("application_id", models.BigIntegerField(help_text="Discord application ID", unique=True)),
+                (
+                    "hash",
+                    models.CharField(blank=True, help_text="SHA-256 of the last synced command tree", max_length=64),
+                ),
+                ("command_ids", models.JSONField(default=dict, help_text="IDs of the synced commands by name")),
+                ("synced_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "locked_until",
+                    models.DateTimeField(blank=True, help_text="Set while a cluster syncs the tree", null=True),
+                ),
+            ],
+            options={"db_table": "commandtreestate", "managed": True},
+        )
+    ]
@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
+import logging
 import sys
-from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from io import BytesIO
 from typing import TYPE_CHECKING, Any, Self, cast
@@ -15,21 +15,26 @@ from django.core.cache import cache
 from django.db import models
 from django.db.models import F, Q
 from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.safestring import SafeText, mark_safe
 from django.utils.timezone import now
 
 from ballsdex.core.discord import View
-from ballsdex.core.image_generator.image_gen import draw_card
+from ballsdex.core.image_generator.image_gen import CardSpec, asset_cache, get_brightness, render_card
 from settings.models import settings
 
 from .enums import DonationPolicy, FriendPolicy, MentionPolicy, PrivacyPolicy, TradeCooldownPolicy
+from .notify import publish_change
 
 if TYPE_CHECKING:
     from django.db.models.fields.files import ImageFieldFile
 
     from ballsdex.core.bot import BallsDexBot
 
+log = logging.getLogger("ballsdex.models")
+
 
 def transform_media(path: str) -> str:
     return path.replace("/static/uploads/", "").replace("/ballsdex/core/image_generator/src/", "default/")
@@ -189,6 +194,9 @@ class Economy(models.Model):
 class Regime(models.Model):
     name = models.CharField(max_length=64)
     background = models.ImageField(max_length=200, help_text="1428x2000 PNG image")
+    background_brightness = models.FloatField(
+        null=True, editable=False, help_text="Brightness of the bottom of the background, computed on save"
+    )
 
     objects: Manager[Self] = Manager()
 
@@ -256,6 +264,9 @@ class Special(models.Model):
     rarity = models.FloatField(help_text="Value between 0 and 1, chances of using this special background.")
     emoji = models.CharField(max_length=20, blank=True, null=True, help_text="A unicode character")
     background = models.ImageField(max_length=200, blank=True, null=True, help_text="1428x2000 PNG image")
+    background_brightness = models.FloatField(
+        null=True, editable=False, help_text="Brightness of the bottom of the background, computed on save"
+    )
     tradeable = models.BooleanField(help_text="Whether balls of this event can be traded", default=True)
     hidden = models.BooleanField(help_text="Hides the event from user commands", default=False)
     credits = models.CharField(max_length=64, help_text="Author of the special event artwork", null=True)
@@ -465,16 +476,22 @@ class BallInstance(models.Model):
         return text
 
     def draw_card(self) -> BytesIO:
-        image, kwargs = draw_card(self)
-        buffer = BytesIO()
-        image.save(buffer, **kwargs)
-        buffer.seek(0)
-        image.close()
-        return buffer
+        return BytesIO(render_card(CardSpec.from_instance(self)))
 
     async def prepare_for_message(
-        self, interaction: discord.Interaction["BallsDexBot"]
+        self, interaction: discord.Interaction["BallsDexBot"], *, scale: int = 1
     ) -> tuple[str, discord.File, View]:
+        """
+        Build the content, card file and view used to display this instance.
+
+        Parameters
+        ----------
+        interaction: discord.Interaction[BallsDexBot]
+            The interaction requesting this message.
+        scale: int
+            Divide the card's dimensions by this value for a cheaper, compact render. Use this
+            when a glance at the card is enough.
+        """
         # message content
         trade_content = ""
         if self.trade_player:
@@ -511,11 +528,11 @@ class BallInstance(models.Model):
         )
 
         # draw image
-        with ThreadPoolExecutor() as pool:
-            buffer = await interaction.client.loop.run_in_executor(pool, self.draw_card)
+        spec = CardSpec.from_instance(self, scale=scale)
+        buffer = BytesIO(await interaction.client.render_service.render(spec))
 
         view = View()
-        return content, discord.File(buffer, "card.webp"), view
+        return content, discord.File(buffer, f"card.{spec.encoding.extension}"), view
 
     async def lock_for_trade(self):
         self.locked = timezone.now()
@@ -574,6 +591,20 @@ class BlacklistHistory(models.Model):
         verbose_name_plural = "blacklisthistories"
 
 
+class CommandTreeState(models.Model):
+    application_id = models.BigIntegerField(unique=True, help_text="Discord application ID")
+    hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the last synced command tree")
+    command_ids = models.JSONField(default=dict, help_text="IDs of the synced commands by name")
+    synced_at = models.DateTimeField(null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Set while a cluster syncs the tree")
+
+    objects: Manager[Self] = Manager()
+
+    class Meta:
+        managed = True
+        db_table = "commandtreestate"
+
+
 class Trade(models.Model):
     date = models.DateTimeField(auto_now_add=True, editable=False)
     player1 = models.ForeignKey(Player, on_delete=models.CASCADE)
@@ -641,3 +672,33 @@ class Block(models.Model):
     class Meta:
         managed = True
         db_table = "block"
+
+
+@receiver(post_save, sender=Regime)
+@receiver(post_save, sender=Special)
+def update_background_brightness(sender: type[Regime | Special], instance: Regime | Special, **kwargs):
+    brightness = None
+    if instance.background:
+        try:
+            brightness = get_brightness(asset_cache.get(instance.background.path))
+        except OSError:
+            log.warning(f"Failed to read the background of {instance}", exc_info=True)
+    if brightness != instance.background_brightness:
+        instance.background_brightness = brightness
+        sender.objects.filter(pk=instance.pk).update(background_brightness=brightness)
+
+
+@receiver(post_save, sender=Ball)
+@receiver(post_delete, sender=Ball)
+@receiver(post_save, sender=Regime)
+@receiver(post_delete, sender=Regime)
+@receiver(post_save, sender=Economy)
+@receiver(post_delete, sender=Economy)
+@receiver(post_save, sender=Special)
+@receiver(post_delete, sender=Special)
+@receiver(post_save, sender=BlacklistedID)
+@receiver(post_delete, sender=BlacklistedID)
+@receiver(post_save, sender=BlacklistedGuild)
+@receiver(post_delete, sender=BlacklistedGuild)
+def notify_cache_change(sender: type[models.Model], instance: models.Model, signal, **kwargs):
+    publish_change(instance, deleted=signal is post_delete)
@@ -0,0 +1,121 @@
+"""
+Notify the running bots of changes to the cached models, so they can update their caches without
+reloading everything.
+
+With PostgreSQL, changes are sent with `NOTIFY` in the transaction that made them, and delivered
+to every `LISTEN`ing process once committed. Other databases (tests) fall back to an in-process
+channel.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, NotRequired, TypedDict
+
+import psycopg
+from django.db import connection, connections
+
+if TYPE_CHECKING:
+    from django.db import models
+
+log = logging.getLogger("ballsdex.models.notify")
+
+CHANNEL = "ballsdex_cache"
+# identifies the changes published by this process, which already applied them to its caches
+PROCESS_ID = uuid.uuid4().hex
+
+
+class Change(TypedDict):
+    model: str
+    pk: int
+    deleted: bool
+    # set for the blacklist models, whose rows are keyed by Discord ID in the cache
+    discord_id: int | None
+    # set for the changes already applied by the process that published them
+    origin: NotRequired[str]
+
+
+class LocalChannel:
+    """
+    An in-process stand-in for `LISTEN/NOTIFY`, used when the database is not PostgreSQL.
+    Changes may be published from any thread.
+    """
+
+    def __init__(self):
+        self.listeners: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue[Change]]] = []
+
+    def publish(self, change: Change):
+        for loop, queue in self.listeners:
+            loop.call_soon_threadsafe(queue.put_nowait, change)
+
+    async def listen(self) -> AsyncIterator[Change]:
+        queue: asyncio.Queue[Change] = asyncio.Queue()
+        listener = (asyncio.get_running_loop(), queue)
+        self.listeners.append(listener)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.listeners.remove(listener)
+
+
+local_channel = LocalChannel()
+
+
+def publish(change: Change):
+    """
+    Publish a change to every listening process. With PostgreSQL, this is only delivered if the
+    current transaction commits.
+    """
+    if connection.vendor != "postgresql":
+        local_channel.publish(change)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, json.dumps(change)))
+
+
+def publish_change(instance: models.Model, *, deleted: bool):
+    """
+    Publish the change of a cached model. With PostgreSQL, this is only delivered if the current
+    transaction commits.
+    """
+    publish(
+        Change(
+            model=instance._meta.model_name or "",
+            pk=instance.pk,
+            deleted=deleted,
+            discord_id=getattr(instance, "discord_id", None),
+        )
+    )
+
+
+async def listen_changes(on_listen: Callable[[], Awaitable[None]] | None = None) -> AsyncIterator[Change]:
+    """
+    Yield the changes published by every process, until the connection is lost.
+
+    With PostgreSQL, `on_listen` is awaited once `LISTEN` is active. Changes made before are
+    lost, reload the cache from there. It is never called with the in-process channel, which
+    does not receive the changes of other processes.
+    """
+    if connections["default"].vendor != "postgresql":
+        async for change in local_channel.listen():
+            yield change
+        return
+
+    params = connections["default"].get_connection_params()
+    # Django's sync cursor class and connection pool do not apply to this connection
+    params.pop("cursor_factory", None)
+    params.pop("pool", None)
+    async with await psycopg.AsyncConnection.connect(**params, autocommit=True) as conn:
+        await conn.execute(f"LISTEN {CHANNEL}")
+        log.info("Listening for cache changes.")
+        if on_listen:
+            await on_listen()
+        async for notify in conn.notifies():
+            try:
+                yield json.loads(notify.payload)
+            except ValueError:
+                log.warning(f"Invalid cache change notification: {notify.payload!r}")
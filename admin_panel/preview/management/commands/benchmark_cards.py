@@ -0,0 +1,188 @@
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.test.utils import override_settings
+
+from ballsdex.core.image_generator import image_gen
+from ballsdex.core.image_generator.image_gen import CardSpec, draw_card_from_spec, encode_card, record_stages
+from bd_models.models import Ball, BallInstance, Economy, Regime, Special, balls, economies, regimes, specials
+from settings.models import Settings, settings
+
+STAGES = ("open", "text", "fit", "paste", "stats", "encode")
+BUNDLED_MEDIA = Path(__file__).parents[3] / "media"
+
+
+def load_fixtures() -> list[BallInstance]:
+    """
+    Build unsaved models from the bundled assets, and fill the model caches with them.
+    """
+    regimes.clear()
+    for pk, (name, background) in enumerate(
+        (("Democracy", "democracy.png"), ("Dictatorship", "dictatorship.png"), ("Union", "union.png")), start=1
+    ):
+        regimes[pk] = Regime(pk=pk, name=name, background=background)
+
+    economies.clear()
+    for pk, (name, icon) in enumerate((("Capitalist", "capitalist.png"), ("Communist", "communist.png")), start=1):
+        economies[pk] = Economy(pk=pk, name=name, icon=icon)
+
+    specials.clear()
+    specials[1] = Special(pk=1, name="Shiny", background="shiny.png", rarity=0, credits="Benchmark")
+
+    balls.clear()
+    descriptions = (
+        "Short description.",
+        "A longer description of this ability, which wraps over multiple lines on the card.",
+        "A description\nwith explicit line breaks\nand a rather long last line to wrap on the card.",
+    )
+    for pk in range(1, 7):
+        balls[pk] = Ball(
+            pk=pk,
+            country=f"Benchmarkball {pk}",
+            health=1000 + pk,
+            attack=500 + pk,
+            rarity=1,
+            emoji_id=0,
+            wild_card="fr_test.png",
+            collection_card="fr_test.png",
+            credits="Benchmark",
+            capacity_name=f"Ability number {pk}",
+            capacity_description=descriptions[pk % len(descriptions)],
+            regime_id=(pk % len(regimes)) + 1,
+            economy_id=(pk % (len(economies) + 1)) or None,
+        )
+
+    instances: list[BallInstance] = []
+    for ball in balls.values():
+        instances.append(BallInstance(ball=ball, attack_bonus=10, health_bonus=-10))
+        instances.append(BallInstance(ball=ball, special=specials[1], attack_bonus=-5, health_bonus=5))
+    return instances
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 3),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark each stage of the card generation with bundled assets, without a database. "
+        "Results are written as JSON, and the command fails if a threshold is exceeded."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--iterations", type=int, default=5, help="Number of renders per card, defaults to 5")
+        parser.add_argument("--output", type=Path, help="Write the JSON results to this file instead of stdout")
+        parser.add_argument(
+            "--warm-assets",
+            action="store_true",
+            help="Keep the decoded assets in memory between renders, otherwise the open stage is measured cold",
+        )
+        parser.add_argument(
+            "--max-ms",
+            action="append",
+            default=[],
+            metavar="STAGE=MS",
+            help="Fail if the median time of a stage (or total) exceeds this value. Can be repeated.",
+        )
+        parser.add_argument("--baseline", type=Path, help="JSON results of a previous run to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative slowdown of a stage's median against the baseline, defaults to 0.25",
+        )
+
+    def parse_thresholds(self, values: list[str]) -> dict[str, float]:
+        thresholds: dict[str, float] = {}
+        for value in values:
+            name, _, ms = value.partition("=")
+            if name not in (*STAGES, "total"):
+                raise CommandError(f'Unknown stage "{name}", must be one of {", ".join(STAGES)} or total.')
+            try:
+                thresholds[name] = float(ms)
+            except ValueError as e:
+                raise CommandError(f'Invalid threshold "{value}", expected STAGE=MS.') from e
+        return thresholds
+
+    def run_benchmark(self, iterations: int, warm_assets: bool) -> dict[str, list[float]]:
+        timings: dict[str, list[float]] = {name: [] for name in (*STAGES, "total")}
+        instances = load_fixtures()
+        for instance in instances:
+            spec = CardSpec.from_instance(instance)
+            for _ in range(iterations):
+                if not warm_assets:
+                    image_gen.asset_cache.clear()
+                # the text and credits color are part of the cached base layer, measure them cold
+                image_gen.text_layer_cache.clear()
+                image_gen.credits_brightness_cache.clear()
+                t1 = time.perf_counter()
+                with record_stages() as stages:
+                    image, kwargs = draw_card_from_spec(spec, cached=False)
+                    encode_card(image, kwargs)
+                timings["total"].append(time.perf_counter() - t1)
+                for name in STAGES:
+                    timings[name].append(stages.get(name, 0))
+                image.close()
+        return timings
+
+    def handle(self, *args, **options):
+        thresholds = self.parse_thresholds(options["max_ms"])
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(options["baseline"].read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read the baseline: {e}") from e
+
+        # default settings, without touching the database
+        settings.instance = Settings()
+
+        with tempfile.TemporaryDirectory() as media:
+            # the artwork is not in the media folder, symlink every asset in a temporary one
+            for asset in BUNDLED_MEDIA.glob("*.png"):
+                Path(media, asset.name).symlink_to(asset.resolve())
+            Path(media, "fr_test.png").symlink_to(image_gen.SOURCES_PATH.resolve() / "fr_test.png")
+            with override_settings(MEDIA_ROOT=media):
+                timings = self.run_benchmark(options["iterations"], options["warm_assets"])
+
+        results = {
+            "renderer_version": image_gen.RENDERER_VERSION,
+            "python": sys.version.split()[0],
+            "iterations": options["iterations"],
+            "renders": len(timings["total"]),
+            "warm_assets": options["warm_assets"],
+            "stages": {name: summarize(values) for name, values in timings.items()},
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            options["output"].write_text(output)
+        else:
+            self.stdout.write(output)
+
+        failures: list[str] = []
+        for name, limit in thresholds.items():
+            median = results["stages"][name]["median_ms"]
+            if median > limit:
+                failures.append(f"{name}: {median:.1f}ms > {limit:.1f}ms")
+        if baseline:
+            for name, values in baseline.get("stages", {}).items():
+                if name not in results["stages"]:
+                    continue
+                limit = values["median_ms"] * (1 + options["tolerance"])
+                median = results["stages"][name]["median_ms"]
+                # ignore sub-millisecond stages, their variance is too high
+                if median > limit and median - values["median_ms"] >= 1:
+                    failures.append(f"{name}: {median:.1f}ms > {values['median_ms']:.1f}ms baseline")
+        if failures:
+            raise CommandError("Thresholds exceeded:\n" + "\n".join(failures))
+        self.stderr.write(self.style.SUCCESS("All thresholds passed."))
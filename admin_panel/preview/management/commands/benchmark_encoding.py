@@ -0,0 +1,101 @@
+import asyncio
+import time
+from dataclasses import replace
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from PIL import Image, features
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from ballsdex.core.image_generator.image_gen import CardEncoding, CardSpec, draw_card_from_spec
+from bd_models.models import Ball, BallInstance
+from settings.models import settings
+
+from ...utils import refresh_cache
+
+ENCODINGS = (
+    CardEncoding("WEBP", quality=80, effort=0),
+    CardEncoding("WEBP", quality=80, effort=4),
+    CardEncoding("WEBP", quality=80, effort=6),
+    CardEncoding("WEBP", quality=90, effort=4),
+    CardEncoding("WEBP", effort=0, lossless=True),
+    CardEncoding("WEBP", quality=80, effort=4, width=750),
+    CardEncoding("AVIF", quality=60, effort=2),
+    CardEncoding("AVIF", quality=60, effort=4),
+    CardEncoding("PNG", effort=1),
+    CardEncoding("PNG", effort=6),
+    CardEncoding("JPEG", quality=85),
+    CardEncoding("JPEG", quality=85, width=750),
+)
+
+
+def describe(encoding: CardEncoding) -> str:
+    text = f"{encoding.format} effort={encoding.effort}"
+    if encoding.lossless:
+        text += " lossless"
+    elif encoding.format != "PNG":
+        text += f" q={encoding.quality}"
+    if encoding.width:
+        text += f" width={encoding.width}"
+    return text
+
+
+class Command(BaseCommand):
+    help = (
+        f"Render a sample of {settings.plural_collectible_name} and compare the encoding time and size "
+        "of the cards for various format settings, including the current one."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--count", type=int, default=10, help="Number of cards to render, defaults to 10")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of encodings per card, defaults to 3")
+
+    async def get_samples(self, count: int) -> list[Image.Image]:
+        await refresh_cache()
+        samples: list[Image.Image] = []
+        async for ball in Ball.objects.filter(enabled=True)[:count]:
+            spec = replace(CardSpec.from_instance(BallInstance(ball=ball)), encoding=CardEncoding())
+            image, _ = draw_card_from_spec(spec)
+            samples.append(image)
+        return samples
+
+    def handle(self, *args, **options):
+        loop = asyncio.get_event_loop()
+        samples = loop.run_until_complete(self.get_samples(options["count"]))
+        if not samples:
+            raise CommandError(f"You need at least one enabled {settings.collectible_name}.")
+
+        current = CardEncoding(
+            format=settings.card_format,
+            quality=settings.card_quality,
+            effort=settings.card_encoding_effort,
+            lossless=settings.card_lossless,
+            width=settings.card_output_width,
+        )
+        encodings = [current, *(x for x in ENCODINGS if x != current)]
+        if not features.check("avif"):
+            self.stderr.write(self.style.WARNING("AVIF is not supported by this Pillow build, skipping."))
+            encodings = [x for x in encodings if x.format != "AVIF"]
+
+        self.stderr.write(f"Encoding {len(samples)} cards {options['repeat']} times with {len(encodings)} settings...")
+        table = Table(box=box.SIMPLE)
+        table.add_column("Setting", style="cyan")
+        table.add_column("Encode (ms)", justify="right", style="green")
+        table.add_column("Size (KiB)", justify="right", style="green")
+
+        for encoding in encodings:
+            timings: list[float] = []
+            sizes: list[int] = []
+            for sample in samples:
+                for _ in range(options["repeat"]):
+                    t1 = time.perf_counter()
+                    buffer = BytesIO()
+                    encoding.prepare(sample).save(buffer, **encoding.save_kwargs())
+                    timings.append(time.perf_counter() - t1)
+                sizes.append(buffer.tell())
+            name = describe(encoding) + (" (current)" if encoding is current else "")
+            table.add_row(name, f"{sum(timings) / len(timings) * 1000:.1f}", f"{sum(sizes) / len(sizes) / 1024:.1f}")
+
+        Console().print(table)
@@ -0,0 +1,47 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from ballsdex.core.image_generator.prerender import base_card_specs, prerender_cards
+from settings.models import settings
+
+from ...utils import refresh_cache
+
+
+class Command(BaseCommand):
+    help = (
+        f"Draw the base card layer of every enabled {settings.collectible_name}, with the regime background "
+        "and each active special event, to warm the template cache. Run this after a deploy or after "
+        "changing assets in the admin panel."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--workers", type=int, help="Number of processes to use, defaults to the CPU count")
+
+    async def prerender(self, *args, **options):
+        await refresh_cache()
+        specs = base_card_specs()
+        if not specs:
+            self.stdout.write(self.style.WARNING("Nothing to render."))
+            return
+        self.stdout.write(f"Rendering {len(specs)} cards...")
+
+        step = max(len(specs) // 20, 1)
+
+        def progress(done: int, total: int):
+            if done % step == 0 or done == total:
+                self.stdout.write(f"{done}/{total} ({done * 100 // total}%)")
+
+        report = await prerender_cards(specs, workers=options.get("workers"), progress=progress)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {report.total - report.failed} cards in {report.elapsed:.2f}s "
+                f"(average {report.average * 1000:.0f}ms, slowest {report.slowest * 1000:.0f}ms per card)."
+            )
+        )
+        if report.failed:
+            self.stdout.write(self.style.ERROR(f"{report.failed} cards failed to render, check the logs."))
+
+    def handle(self, *args, **options):
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.prerender(*args, **options))
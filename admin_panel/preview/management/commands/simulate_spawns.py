@@ -0,0 +1,475 @@
+import asyncio
+import heapq
+import importlib
+import json
+import math
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ballsdex.packages.countryballs.spawn import BaseSpawnManager, SpawnManager
+from settings.models import Settings, settings
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+# same member count brackets as the default spawn manager
+SIZE_BUCKETS = ((5, "1-4"), (100, "5-99"), (1000, "100-999"), (math.inf, "1000+"))
+# time multiplier of each member count bracket in the legacy spawn manager
+LEGACY_TIME_MULTIPLIERS = ((5, 0.1), (100, 0.8), (1000, 0.5), (math.inf, 0.2))
+
+
+class SimGuild:
+    __slots__ = ("id", "name", "member_count", "icon")
+
+    def __init__(self, id: int, member_count: int):
+        self.id = id
+        self.name = f"Guild {id}"
+        self.member_count = member_count
+        self.icon = None
+
+
+class SimMessage:
+    """
+    The subset of `discord.Message` read by the spawn managers.
+    """
+
+    __slots__ = ("guild", "author", "content", "created_at", "webhook_id", "_state")
+
+    def __init__(self, guild: SimGuild, author: SimpleNamespace, content: str, created_at: datetime, state):
+        self.guild = guild
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+        self.webhook_id = None
+        self._state = state
+
+
+def size_bucket(member_count: int) -> str:
+    return next(name for limit, name in SIZE_BUCKETS if member_count < limit)
+
+
+class StreamBuilder:
+    """
+    Build message streams, sharing the author objects and contents between messages to keep the
+    memory used by the stream itself constant.
+    """
+
+    def __init__(self, message_content: bool):
+        self.state = SimpleNamespace(intents=SimpleNamespace(message_content=message_content))
+        self.guilds: dict[int, SimGuild] = {}
+        self.authors: dict[int, SimpleNamespace] = {}
+        self.contents: dict[int, str] = {}
+
+    def message(self, guild_id: int, member_count: int, author_id: int, length: int, created_at: datetime):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = SimGuild(guild_id, member_count)
+        author = self.authors.get(author_id)
+        if author is None:
+            author = self.authors[author_id] = SimpleNamespace(id=author_id, bot=False)
+        content = self.contents.get(length)
+        if content is None:
+            content = self.contents[length] = "a" * length
+        return SimMessage(guild, author, content, created_at, self.state)
+
+    def synthetic(
+        self,
+        *,
+        seed: int,
+        guilds: int,
+        hours: float,
+        members: tuple[int, int],
+        chatters: tuple[int, int],
+        rate: float,
+        short_ratio: float,
+    ) -> Iterator[SimMessage]:
+        """
+        Generate the messages of `guilds` guilds over `hours` hours, in chronological order.
+
+        Member counts are log-uniform in the `members` range, and each guild has between
+        `chatters` active authors, the first ones talking the most (Zipf's law). Messages follow a
+        Poisson process, each guild's rate being drawn from an exponential distribution with a
+        mean of `rate` messages per minute.
+        """
+        rng = random.Random(seed)
+        end = hours * 3600
+        heap: list[tuple[float, int]] = []
+        profiles: list[tuple[int, int, list[int], list[float], float]] = []
+        for index in range(guilds):
+            member_count = round(math.exp(rng.uniform(math.log(members[0]), math.log(members[1]))))
+            authors = [index * 10_000 + i for i in range(min(rng.randint(*chatters), member_count))]
+            weights = list(accumulate(1 / (i + 1) for i in range(len(authors))))
+            per_second = rng.expovariate(1 / rate) / 60
+            profiles.append((index + 1, member_count, authors, weights, per_second))
+            if per_second > 0:
+                heapq.heappush(heap, (rng.expovariate(per_second), index))
+
+        while heap:
+            at, index = heapq.heappop(heap)
+            if at >= end:
+                continue
+            guild_id, member_count, authors, weights, per_second = profiles[index]
+            author_id = rng.choices(authors, cum_weights=weights)[0]
+            length = rng.randint(1, 4) if rng.random() < short_ratio else rng.randint(5, 200)
+            yield self.message(guild_id, member_count, author_id, length, START + timedelta(seconds=at))
+            heapq.heappush(heap, (at + rng.expovariate(per_second), index))
+
+    def recorded(self, path: Path) -> Iterator[SimMessage]:
+        """
+        Read a recorded stream, one JSON object per line with the keys `timestamp` (UNIX time),
+        `guild`, `members`, `author` and `length`, in chronological order.
+        """
+        with path.open() as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    yield self.message(
+                        int(data["guild"]),
+                        int(data["members"]),
+                        int(data["author"]),
+                        int(data["length"]),
+                        datetime.fromtimestamp(float(data["timestamp"]), tz=UTC),
+                    )
+                except (ValueError, KeyError, TypeError) as e:
+                    raise CommandError(f"Invalid message on line {line_number} of {path}: {e}") from e
+
+
+@dataclass
+class LegacyCooldown:
+    time: datetime
+    scaled_message_count: float
+    locked_until: float = -math.inf
+    message_cache: deque[int] = field(default_factory=lambda: deque(maxlen=100))
+
+
+def legacy_spawns(messages: list[SimMessage]) -> set[int]:
+    """
+    Return the indexes of the messages that spawn with the reference logic of the default spawn
+    manager, as it was before its ratelimit used message timestamps.
+
+    It held a lock for 10 seconds after each counted message, ignoring the messages received
+    meanwhile, and decided once the lock was released. Each guild's decisions were taken in
+    order, so they are replayed sequentially here. The threshold is always `spawn_chance_min`.
+    """
+    threshold = settings.spawn_chance_min
+    cooldowns: dict[int, LegacyCooldown] = {}
+    spawned: set[int] = set()
+    for index, message in enumerate(messages):
+        guild = message.guild
+        cooldown = cooldowns.get(guild.id)
+        if cooldown is None:
+            cooldown = cooldowns[guild.id] = LegacyCooldown(message.created_at, settings.spawn_chance_min // 2)
+        delta_t = (message.created_at - cooldown.time).total_seconds()
+        if not guild.member_count:
+            continue
+        time_multiplier = next(
+            x for limit, x in ((5, 0.1), (100, 0.8), (1000, 0.5), (math.inf, 0.2)) if guild.member_count < limit
+        )
+
+        cooldown.message_cache.append(message.author.id)
+        timestamp = message.created_at.timestamp()
+        if timestamp < cooldown.locked_until:
+            continue
+        cooldown.locked_until = timestamp + 10
+        message_multiplier = 1
+        if message.guild.member_count < 5 or message.guild.member_count > 1000:
+            message_multiplier /= 2
+        if message._state.intents.message_content and len(message.content) < 5:
+            message_multiplier /= 2
+        authors = cooldown.message_cache
+        if len(set(authors)) < 4 or authors.count(message.author.id) / 100 > 0.4:
+            message_multiplier /= 2
+        cooldown.scaled_message_count += message_multiplier
+
+        if cooldown.scaled_message_count + time_multiplier * (delta_t // 60) <= threshold or delta_t < 600:
+            continue
+        cooldown.scaled_message_count = 1.0
+        cooldown.time = message.created_at
+        spawned.add(index)
+    return spawned
+
+
+async def replay(manager: BaseSpawnManager, messages: list[SimMessage]) -> set[int]:
+    """
+    Deliver the messages to the manager as the bot does, each in its own task started when the
+    message is received, and return the indexes of the messages that spawned.
+    """
+    spawned: set[int] = set()
+    pending: set[asyncio.Task[None]] = set()
+
+    async def handle(index: int, message: SimMessage):
+        if await manager.handle_message(message):  # type: ignore
+            spawned.add(index)
+
+    for index, message in enumerate(messages):
+        task = asyncio.create_task(handle(index, message))
+        # runs until it returns or sleeps
+        await asyncio.sleep(0)
+        if not task.done():
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    await asyncio.gather(*pending)
+    return spawned
+
+
+def check_legacy(messages: list[SimMessage], seed: int) -> dict:
+    """
+    Compare the decisions of the current default spawn manager with the legacy reference logic.
+    Thresholds are made constant by collapsing the spawn chance range to its minimum, so the
+    order of the random draws does not matter.
+    """
+    spawn_chance_max = settings.spawn_chance_max
+    settings.spawn_chance_max = settings.spawn_chance_min
+    try:
+        legacy = legacy_spawns(messages)
+        random.seed(seed)
+        current = asyncio.run(replay(SpawnManager(SimpleNamespace(shard_ids=None)), messages))  # type: ignore
+    finally:
+        settings.spawn_chance_max = spawn_chance_max
+
+    mismatches = sorted(legacy.symmetric_difference(current))
+    result: dict = {"messages": len(messages), "spawns": len(current), "mismatches": len(mismatches)}
+    if mismatches:
+        message = messages[mismatches[0]]
+        result["first_mismatch"] = {
+            "index": mismatches[0],
+            "guild": message.guild.id,
+            "timestamp": message.created_at.timestamp(),
+            "legacy": mismatches[0] in legacy,
+        }
+    return result
+
+
+def import_manager(path: str) -> type[BaseSpawnManager]:
+    module_path, _, class_name = path.rpartition(".")
+    try:
+        manager = getattr(importlib.import_module(module_path), class_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise CommandError(f'Could not import the spawn manager "{path}": {e}') from e
+    if not isinstance(manager, type) or not issubclass(manager, BaseSpawnManager):
+        raise CommandError(f'"{path}" is not a spawn manager.')
+    return manager
+
+
+def percentiles(values: list[float]) -> dict[str, float] | None:
+    if len(values) < 2:
+        return None
+    deciles = statistics.quantiles(values, n=10)
+    return {
+        "p10": round(deciles[0], 1),
+        "median": round(statistics.median(values), 1),
+        "p90": round(deciles[-1], 1),
+        "max": round(max(values), 1),
+    }
+
+
+async def simulate(manager: BaseSpawnManager, messages: Iterator[SimMessage]) -> dict:
+    processing = 0.0
+    count = 0
+    first: datetime | None = None
+    last: datetime | None = None
+    last_spawns: dict[int, datetime] = {}
+    intervals: list[float] = []
+    spawns_by_bucket: dict[str, int] = {}
+    spawns_by_algo: dict[str, int] = {}
+    guild_buckets: dict[int, str] = {}
+
+    for message in messages:
+        count += 1
+        first = first or message.created_at
+        last = message.created_at
+        guild = message.guild
+        if guild.id not in guild_buckets:
+            guild_buckets[guild.id] = size_bucket(guild.member_count)
+
+        t1 = time.perf_counter()
+        result = await manager.handle_message(message)  # type: ignore
+        processing += time.perf_counter() - t1
+        if result is False:
+            continue
+
+        if isinstance(result, tuple):
+            algo = result[1]
+            spawns_by_algo[algo] = spawns_by_algo.get(algo, 0) + 1
+        bucket = guild_buckets[guild.id]
+        spawns_by_bucket[bucket] = spawns_by_bucket.get(bucket, 0) + 1
+        if previous := last_spawns.get(guild.id):
+            intervals.append((message.created_at - previous).total_seconds() / 60)
+        last_spawns[guild.id] = message.created_at
+
+    hours = (last - first).total_seconds() / 3600 if first and last else 0
+    guilds_by_bucket: dict[str, int] = {}
+    for bucket in guild_buckets.values():
+        guilds_by_bucket[bucket] = guilds_by_bucket.get(bucket, 0) + 1
+
+    def per_guild_hour(spawns: int, guilds: int) -> float | None:
+        return round(spawns / (guilds * hours), 4) if guilds and hours else None
+
+    spawns = sum(spawns_by_bucket.values())
+    return {
+        "messages": count,
+        "guilds": len(guild_buckets),
+        "hours": round(hours, 2),
+        "spawns": spawns,
+        "spawns_per_guild_hour": per_guild_hour(spawns, len(guild_buckets)),
+        "spawns_per_guild_hour_by_size": {
+            name: per_guild_hour(spawns_by_bucket.get(name, 0), guilds_by_bucket[name])
+            for _, name in SIZE_BUCKETS
+            if name in guilds_by_bucket
+        },
+        "spawns_by_algo": spawns_by_algo or None,
+        "spawn_interval_minutes": percentiles(intervals),
+        "messages_per_second": round(count / processing) if processing else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Feed a synthetic or recorded message stream through spawn managers without Discord or a "
+        "database, and report their spawn rates, spawn intervals, throughput and memory as JSON."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--manager",
+            action="append",
+            default=[],
+            help="Python path of a spawn manager to simulate, defaults to the built-in one. Can be repeated.",
+        )
+        parser.add_argument("--input", type=Path, help="Replay a recorded stream (JSON lines) instead")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic stream and spawn managers")
+        parser.add_argument("--guilds", type=int, default=100, help="Number of synthetic guilds, defaults to 100")
+        parser.add_argument("--hours", type=float, default=24, help="Duration of the synthetic stream")
+        parser.add_argument(
+            "--members", type=int, nargs=2, default=(5, 5000), metavar=("MIN", "MAX"), help="Range of member counts"
+        )
+        parser.add_argument(
+            "--chatters", type=int, nargs=2, default=(2, 20), metavar=("MIN", "MAX"), help="Active authors per guild"
+        )
+        parser.add_argument("--rate", type=float, default=1, help="Mean messages per minute per guild")
+        parser.add_argument("--short-ratio", type=float, default=0.2, help="Share of messages under 5 characters")
+        parser.add_argument(
+            "--no-message-content", action="store_true", help="Simulate a bot without the message content intent"
+        )
+        parser.add_argument(
+            "--spawn-chance", type=int, nargs=2, metavar=("MIN", "MAX"), help="Override the spawn chance range"
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="Measure the peak memory allocated by each run. Slows the processing, do not compare throughput",
+        )
+        parser.add_argument(
+            "--check-legacy",
+            action="store_true",
+            help="Also compare the decisions of the default spawn manager with its logic from before its "
+            "ratelimit used message timestamps, and exit with an error if any spawn decision differs",
+        )
+        parser.add_argument("--output", type=Path, help="Write the JSON results to this file instead of stdout")
+        parser.add_argument("--baseline", type=Path, help="JSON results of a previous run to compare against")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative drop of messages processed per second against the baseline, defaults to 0.25",
+        )
+
+    def stream(self, options) -> Iterator[SimMessage]:
+        builder = StreamBuilder(not options["no_message_content"])
+        if options["input"]:
+            return builder.recorded(options["input"])
+        if options["guilds"] < 1 or options["hours"] <= 0 or options["rate"] <= 0:
+            raise CommandError("The number of guilds, hours and message rate must be positive.")
+        if not 1 <= options["members"][0] <= options["members"][1]:
+            raise CommandError("Invalid member count range.")
+        if not 1 <= options["chatters"][0] <= options["chatters"][1]:
+            raise CommandError("Invalid chatter count range.")
+        return builder.synthetic(
+            seed=options["seed"],
+            guilds=options["guilds"],
+            hours=options["hours"],
+            members=options["members"],
+            chatters=options["chatters"],
+            rate=options["rate"],
+            short_ratio=options["short_ratio"],
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(options["baseline"].read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read the baseline: {e}") from e
+
+        # default settings, without touching the database
+        settings.instance = Settings()
+        if options["spawn_chance"]:
+            settings.spawn_chance_min, settings.spawn_chance_max = options["spawn_chance"]
+        managers = [import_manager(x) for x in options["manager"] or [settings.spawn_manager]]
+        bot = SimpleNamespace(shard_ids=None)
+
+        runs: dict[str, dict] = {}
+        for manager_cls in managers:
+            name = f"{manager_cls.__module__}.{manager_cls.__qualname__}"
+            # every manager sees the same stream and random numbers
+            random.seed(options["seed"])
+            if options["trace_memory"]:
+                tracemalloc.start()
+            manager = manager_cls(bot)  # type: ignore
+            runs[name] = asyncio.run(simulate(manager, self.stream(options)))
+            if options["trace_memory"]:
+                runs[name]["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            del manager
+
+        legacy_check = None
+        if options["check_legacy"]:
+            legacy_check = check_legacy(list(self.stream(options)), options["seed"])
+
+        results = {
+            "python": sys.version.split()[0],
+            "seed": options["seed"],
+            "spawn_chance": [settings.spawn_chance_min, settings.spawn_chance_max],
+            "managers": runs,
+            "legacy_check": legacy_check,
+            # kilobytes on Linux, bytes on macOS
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            options["output"].write_text(output)
+        else:
+            self.stdout.write(output)
+
+        if legacy_check and legacy_check["mismatches"]:
+            raise CommandError(
+                f"{legacy_check['mismatches']} spawn decisions differ from the legacy spawn manager, "
+                f"first at message {legacy_check['first_mismatch']['index']}."
+            )
+        if baseline and not options["trace_memory"]:
+            failures: list[str] = []
+            for name, values in baseline.get("managers", {}).items():
+                if name not in runs or not values.get("messages_per_second"):
+                    continue
+                rate = runs[name]["messages_per_second"] or 0
+                limit = values["messages_per_second"] * (1 - options["tolerance"])
+                if rate < limit:
+                    failures.append(f"{name}: {rate} messages/s < {values['messages_per_second']} baseline")
+            if failures:
+                raise CommandError("Throughput regressed:\n" + "\n".join(failures))
+            self.stderr.write(self.style.SUCCESS("Throughput is within the baseline tolerance."))
@@ -14,7 +14,7 @@ async def render_ballinstance(request: HttpRequest, ball_pk: int) -> HttpRespons
     instance = BallInstance(ball=ball)
     image, kwargs = draw_card(instance)
 
-    response = HttpResponse(content_type="image/png")
+    response = HttpResponse(content_type=f"image/{kwargs['format'].lower()}")
     image.save(response, **kwargs)  # type: ignore
     return response
 
@@ -31,6 +31,6 @@ async def render_special(request: HttpRequest, special_pk: int) -> HttpResponse:
     instance = BallInstance(ball=ball, special=special)
     image, kwargs = draw_card(instance)
 
-    response = HttpResponse(content_type="image/png")
+    response = HttpResponse(content_type=f"image/{kwargs['format'].lower()}")
     image.save(response, **kwargs)  # type: ignore
     return response
@@ -71,6 +71,7 @@ class SettingsAdmin(admin.ModelAdmin):
                     "max_health_bonus",
                     "spawn_chance_min",
                     "spawn_chance_max",
+                    "spawn_asset_channel_id",
                     "show_rarity",
                 ),
                 "classes": ("collapse",),
@@ -97,6 +98,23 @@ class SettingsAdmin(admin.ModelAdmin):
                 "fields": ("client_id", "client_secret"),
             },
         ),
+        (
+            "Card rendering",
+            {
+                "description": "Control how the cards are generated by the bot",
+                "classes": ("collapse",),
+                "fields": (
+                    "card_render_workers",
+                    "card_render_queue_size",
+                    "card_render_timeout",
+                    "card_format",
+                    "card_quality",
+                    "card_encoding_effort",
+                    "card_lossless",
+                    "card_output_width",
+                ),
+            },
+        ),
         (
             "Advanced",
             {
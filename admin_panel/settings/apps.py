@@ -4,6 +4,7 @@ import sys
 
 from asgiref.sync import sync_to_async
 from django.apps import AppConfig
+from django.db import DatabaseError
 
 log = logging.getLogger(__name__)
 
@@ -31,4 +32,9 @@ class SettingsConfig(AppConfig):
             task.add_done_callback(lambda t: log.info("Settings read successfully."))
         except RuntimeError:
             # if the bot is running in a sync context
-            load_settings()
+            try:
+                load_settings()
+            except DatabaseError as e:
+                # commands that do not need the database (benchmarks) set their own settings, the
+                # others fail later with a "Settings aren't loaded yet" error
+                log.warning(f"Could not read the settings from the database: {e}")
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("settings", "0006_alter_settings_admin_channel_ids_and_more")]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="card_render_queue_size",
+            field=models.PositiveIntegerField(
+                default=50, help_text="Maximum number of cards waiting to be generated, further requests are rejected."
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_render_timeout",
+            field=models.PositiveIntegerField(
+                default=30, help_text="Maximum number of seconds to wait for a card to be generated."
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_render_workers",
+            field=models.PositiveSmallIntegerField(
+                default=2,
+                help_text="Number of processes generating cards. Set to 0 to generate them in a thread of the bot "
+                "process.",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-17 11:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("settings", "0007_settings_card_render")]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="card_encoding_effort",
+            field=models.PositiveSmallIntegerField(
+                default=4,
+                help_text="Compression effort from 0 (fastest) to 9 (smallest files). "
+                "Higher values use more CPU when generating cards.",
+                validators=[django.core.validators.MaxValueValidator(9)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_format",
+            field=models.CharField(
+                choices=[("WEBP", "Webp"), ("AVIF", "Avif"), ("PNG", "Png"), ("JPEG", "Jpeg")],
+                default="WEBP",
+                help_text="Image format of the cards. JPEG does not support transparency.",
+                max_length=4,
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_lossless",
+            field=models.BooleanField(
+                default=False, help_text="Encode the cards without quality loss. Produces much larger files."
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_output_width",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="Downscale the cards to this width in pixels before sending them. "
+                "Leave empty for full size (1500).",
+                null=True,
+                validators=[django.core.validators.MaxValueValidator(1500)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="settings",
+            name="card_quality",
+            field=models.PositiveSmallIntegerField(
+                default=80,
+                help_text="Encoding quality of the cards, from 0 to 100. Ignored for PNG.",
+                validators=[django.core.validators.MaxValueValidator(100)],
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("settings", "0008_settings_card_encoding")]
+
+    operations = [
+        migrations.AddField(
+            model_name="settings",
+            name="spawn_asset_channel_id",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                default=None,
+                help_text="ID of a private channel where the bot uploads wild cards ahead of time, so spawns "
+                "show them without waiting for an upload. Each upload is reused until its URL expires. Leave empty to "
+                "upload on every spawn.",
+                null=True,
+            ),
+        )
+    ]
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import random
 import re
 import warnings
 from typing import TYPE_CHECKING, cast
 
 from django.conf import settings as django_settings
-from django.core.validators import RegexValidator
+from django.core.validators import MaxValueValidator, RegexValidator
 from django.db import models
 from django.db.models import F, Q
 from django.db.models.signals import post_init
@@ -14,6 +13,8 @@ from django.dispatch import receiver
 from django.forms import ValidationError
 from django.utils.functional import cached_property
 
+from ballsdex.core.utils.sampling import WeightedSampler
+
 COLON_IDS_RE = re.compile(r"^(\d{17,21}(;\d{17,21})*)?$")
 SLASH_COMMAND_RE = re.compile(r"^[-_'\S]{1,32}$")
 DISCORD_INVITE_RE = re.compile(r"^https?://(discord.gg|discord(app)?.com/invite)/[a-zA-Z0-9]+$")
@@ -23,6 +24,12 @@ PYTHON_PATH_RE = re.compile(r"^[a-zA-Z_][\\.a-zA-Z0-9_]+$")
 
 
 class Settings(models.Model):
+    class CardFormat(models.TextChoices):
+        WEBP = "WEBP"
+        AVIF = "AVIF"
+        PNG = "PNG"
+        JPEG = "JPEG"
+
     # base settings
     bot_token = models.CharField(help_text="Discord bot token", max_length=80, default="")
     prefix = models.CharField(help_text="Prefix for all text commands", max_length=10, default="b.")
@@ -103,6 +110,14 @@ class Settings(models.Model):
         "A wide range between min and max leads to a broader difference in spawn times.",
         default=55,
     )
+    spawn_asset_channel_id = models.PositiveBigIntegerField(
+        help_text="ID of a private channel where the bot uploads wild cards ahead of time, so spawns show "
+        "them without waiting for an upload. Each upload is reused until its URL expires. Leave empty to upload on "
+        "every spawn.",
+        null=True,
+        blank=True,
+        default=None,
+    )
     spawn_manager = models.TextField(
         help_text="Python path to a class that will handle spawn logic.",
         default="ballsdex.packages.countryballs.spawn.SpawnManager",
@@ -164,6 +179,45 @@ class Settings(models.Model):
     def co_owners(self):
         return [] if self.coowners is None else [int(x) for x in self.coowners.split(";") if x]
 
+    # card rendering
+    card_render_workers = models.PositiveSmallIntegerField(
+        help_text="Number of processes generating cards. Set to 0 to generate them in a thread of the bot process.",
+        default=2,
+    )
+    card_render_queue_size = models.PositiveIntegerField(
+        help_text="Maximum number of cards waiting to be generated, further requests are rejected.", default=50
+    )
+    card_render_timeout = models.PositiveIntegerField(
+        help_text="Maximum number of seconds to wait for a card to be generated.", default=30
+    )
+    card_format = models.CharField(
+        max_length=4,
+        choices=CardFormat,
+        help_text="Image format of the cards. JPEG does not support transparency.",
+        default=CardFormat.WEBP,
+    )
+    card_quality = models.PositiveSmallIntegerField(
+        help_text="Encoding quality of the cards, from 0 to 100. Ignored for PNG.",
+        default=80,
+        validators=(MaxValueValidator(100),),
+    )
+    card_encoding_effort = models.PositiveSmallIntegerField(
+        help_text="Compression effort from 0 (fastest) to 9 (smallest files). "
+        "Higher values use more CPU when generating cards.",
+        default=4,
+        validators=(MaxValueValidator(9),),
+    )
+    card_lossless = models.BooleanField(
+        help_text="Encode the cards without quality loss. Produces much larger files.", default=False
+    )
+    card_output_width = models.PositiveIntegerField(
+        help_text="Downscale the cards to this width in pixels before sending them. Leave empty for full size (1500).",
+        null=True,
+        blank=True,
+        default=None,
+        validators=(MaxValueValidator(1500),),
+    )
+
     prometheus_enabled = models.BooleanField(help_text="Enable the Prometheus metrics collection", default=False)
     prometheus_host = models.GenericIPAddressField(help_text="IP to bind for Prometheus server", default="0.0.0.0")
     prometheus_port = models.PositiveIntegerField(help_text="Port to bind for Prometheus server", default=15260)
@@ -206,24 +260,18 @@ class Settings(models.Model):
     def slow_messages(self) -> dict[str, float]:
         return {x.message: x.rarity for x in self.prompts.all() if x.category == PromptMessage.PromptType.SLOW}
 
+    @cached_property
+    def message_samplers(self) -> dict[str, WeightedSampler[str]]:
+        messages = {
+            PromptMessage.PromptType.CATCH: self.catch_messages,
+            PromptMessage.PromptType.WRONG: self.wrong_messages,
+            PromptMessage.PromptType.SPAWN: self.spawn_messages,
+            PromptMessage.PromptType.SLOW: self.slow_messages,
+        }
+        return {category: WeightedSampler(x.keys(), x.values()) for category, x in messages.items()}
+
     def get_random_message(self, category: PromptMessage.PromptType):
-        match category:
-            case PromptMessage.PromptType.CATCH:
-                return random.choices(
-                    population=list(self.catch_messages.keys()), weights=list(self.catch_messages.values()), k=1
-                )[0]
-            case PromptMessage.PromptType.WRONG:
-                return random.choices(
-                    population=list(self.wrong_messages.keys()), weights=list(self.wrong_messages.values()), k=1
-                )[0]
-            case PromptMessage.PromptType.SPAWN:
-                return random.choices(
-                    population=list(self.spawn_messages.keys()), weights=list(self.spawn_messages.values()), k=1
-                )[0]
-            case PromptMessage.PromptType.SLOW:
-                return random.choices(
-                    population=list(self.slow_messages.keys()), weights=list(self.slow_messages.values()), k=1
-                )[0]
+        return self.message_samplers[category].sample()
 
     @property
     @warnings.deprecated("This setting returns nothing, Webhook notifications must be used instead")
@@ -316,5 +364,7 @@ def load_settings():
     instance = Settings.objects.prefetch_related("prompts").first()
     if not instance:
         raise RuntimeError("No Settings instance found!")
+    # build the samplers before swapping the instance, so readers never see a half-loaded one
+    instance.message_samplers
     singleton = cast(SettingsProxy, settings)
     singleton.instance = instance
@@ -1,39 +1,49 @@
 from __future__ import annotations
 
 import asyncio
-import inspect
+import hashlib
+import json
 import logging
 import math
 import time
 import types
-from datetime import datetime
-from typing import TYPE_CHECKING, Self, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Awaitable, Container, Self, Sequence, cast
 
 import aiohttp
 import discord
 import discord.gateway
 from aiohttp import ClientTimeout
+from asgiref.sync import sync_to_async
 from cachetools import TTLCache
 from discord import app_commands
 from discord.app_commands.translator import TranslationContextLocation, TranslationContextTypes, locale_str
 from discord.enums import Locale
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.utils import MISSING
 from django.apps import apps
-from prometheus_client import Histogram
+from django.db.models import Q
+from django.utils import timezone
+from prometheus_client import Counter, Gauge, Histogram
 from rich import box, print
 from rich.console import Console
 from rich.table import Table
 
+from ballsdex.core.cache_sync import CacheSync
 from ballsdex.core.commands import Core
 from ballsdex.core.dev import Dev
 from ballsdex.core.help import HelpCommand
+from ballsdex.core.image_generator.prerender import base_card_specs, prerender_cards
+from ballsdex.core.image_generator.render_service import RenderError, RenderService
 from ballsdex.core.metrics import PrometheusServer
 from ballsdex.core.utils.checks import check_perms
 from bd_models.models import (
     Ball,
     BlacklistedGuild,
     BlacklistedID,
+    CommandTreeState,
     Economy,
     Regime,
     Special,
@@ -42,14 +52,26 @@ from bd_models.models import (
     regimes,
     specials,
 )
-from settings.models import settings
+from settings.models import Settings, SettingsProxy, settings
 
 if TYPE_CHECKING:
     from discord.ext.commands.bot import PrefixType
 
 log = logging.getLogger("ballsdex.core.bot")
 http_counter = Histogram("discord_http_requests", "HTTP requests", ["key", "code"])
+http_ratelimits = Counter("discord_http_ratelimits", "HTTP requests rejected with a 429 status", ["key", "scope"])
+http_ratelimit_wait = Histogram(
+    "discord_http_ratelimit_wait", "Time spent waiting for rate limits and retries per request", ["key"]
+)
+http_retries = Counter("discord_http_retries", "HTTP requests sent again after a rate limit or error", ["key"])
+gateway_messages = Counter("gateway_messages", "Messages received from the gateway", ["result"])
+startup_seconds = Gauge("startup_seconds", "Duration of each startup phase", ["phase"])
+first_interaction_seconds = Gauge(
+    "startup_first_interaction_seconds", "Time between the process start and the first interaction received"
+)
 impersonations: dict[int, discord.Member] = {}
+# close enough to the process start, this module is imported first
+process_start = time.monotonic()
 
 DEFAULT_PACKAGES = (
     ("admin", "ballsdex.packages.admin"),
@@ -67,25 +89,93 @@ def owner_check(ctx: commands.Context[BallsDexBot]):
 
 
 class Translator(app_commands.Translator):
+    """
+    Replace the default names of the commands with the ones configured in the settings.
+
+    The translations only depend on the settings, not on the locale, so they are cached until the
+    settings are reloaded.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache: dict[tuple[str, bool], str] = {}
+        self.settings_instance: Settings | None = None
+
+    def check_settings(self):
+        """
+        Invalidate the cache if the settings were reloaded since the last translation.
+        """
+        instance = cast(SettingsProxy, settings).instance
+        if instance is not self.settings_instance:
+            self.settings_instance = instance
+            self.cache.clear()
+
     async def translate(self, string: locale_str, locale: Locale, context: TranslationContextTypes) -> str | None:
+        self.check_settings()
+        is_name = context.location in (TranslationContextLocation.command_name, TranslationContextLocation.group_name)
+        key = (string.message, is_name)
+        if (text := self.cache.get(key)) is not None:
+            return text
+
         text = (
             string.message.replace("countryballs", settings.plural_collectible_name)
             .replace("countryball", settings.collectible_name)
             .replace("/balls", f"/{settings.balls_slash_name}")
             .replace("BallsDex", settings.bot_name)
         )
-        if context.location in (TranslationContextLocation.command_name, TranslationContextLocation.group_name):
+        if is_name:
             text = text.replace(" ", "-").lower()
 
+        self.cache[key] = text
         return text
 
 
+@dataclass(slots=True)
+class HTTPRequestInfo:
+    """
+    The discord.py request being sent by the current task, shared with the aiohttp trace hooks.
+    """
+
+    route_key: str
+    attempts: int = 0
+    # time spent waiting for Discord's responses, the rest is spent on rate limits and retries
+    response_time: float = 0
+
+
+current_request: ContextVar[HTTPRequestInfo | None] = ContextVar("current_request", default=None)
+
+
+def instrument_http(http: discord.http.HTTPClient):
+    """
+    Wrap `HTTPClient.request` to expose the route of the request being sent to the aiohttp trace
+    hooks, and measure the time spent waiting for rate limits.
+    """
+    request = http.request
+
+    async def instrumented_request(route: discord.http.Route, **kwargs):
+        info = HTTPRequestInfo(route.key)
+        token = current_request.set(info)
+        start = asyncio.get_running_loop().time()
+        try:
+            return await request(route, **kwargs)
+        finally:
+            current_request.reset(token)
+            total = asyncio.get_running_loop().time() - start
+            http_ratelimit_wait.labels(info.route_key).observe(max(total - info.response_time, 0))
+
+    http.request = instrumented_request  # type: ignore
+
+
 # observing the duration and status code of HTTP requests through aiohttp TraceConfig
 async def on_request_start(
     session: aiohttp.ClientSession, trace_ctx: types.SimpleNamespace, params: aiohttp.TraceRequestStartParams
 ):
     # register t1 before sending request
     trace_ctx.start = session.loop.time()
+    if (info := current_request.get()) is not None:
+        info.attempts += 1
+        if info.attempts > 1:
+            http_retries.labels(info.route_key).inc()
 
 
 async def on_request_end(
@@ -93,32 +183,23 @@ async def on_request_end(
 ):
     time = session.loop.time() - trace_ctx.start
 
-    # to categorize HTTP calls per path, we need to access the corresponding discord.http.Route
-    # object, which is not available in the context of an aiohttp TraceConfig, therefore it's
-    # obtained by walking the call stack to find the frame containing the Route object.
-    # "params.url.path" is not usable as it contains raw IDs and tokens, breaking categories.
-    # We walk up to 15 frames to account for instrumentation layers (e.g. ddtrace) that may
-    # insert extra frames between aiohttp's trace callback and discord.py's HTTPClient.request.
-    route_key = None
-    frame = inspect.currentframe()
-    try:
-        f = frame.f_back  # type: ignore
-        for _ in range(15):
-            if f is None:
-                break
-            route = f.f_locals.get("route")
-            if route is not None and hasattr(route, "key"):
-                route_key = route.key
-                break
-            f = f.f_back
-    finally:
-        del frame
-
-    http_counter.labels(route_key, params.response.status).observe(time)
+    # "params.url.path" is not usable as it contains raw IDs and tokens, breaking categories
+    info = current_request.get()
+    route_key = info.route_key if info else None
+    if info:
+        info.response_time += time
+    status = params.response.status
+    http_counter.labels(route_key, status).observe(time)
+    if status == 429:
+        scope = params.response.headers.get("X-RateLimit-Scope", "unknown")
+        http_ratelimits.labels(route_key, scope).inc()
 
 
 class CommandTree[Bot: BallsDexBot](app_commands.CommandTree[Bot]):
     disable_time_check: bool = False
+    sync_lock_duration: float = 300
+    # IDs of the global commands by name, from the last sync or fetch
+    command_ids: dict[str, int] | None = None
 
     async def interaction_check(self, interaction: discord.Interaction[Bot], /) -> bool:
         # checking if the moment we receive this interaction isn't too late already
@@ -156,10 +237,11 @@ class CommandTree[Bot: BallsDexBot](app_commands.CommandTree[Bot]):
     async def load_command_mentions(
         self, app_commands: list[app_commands.AppCommand] | None = None, *, cog: commands.Cog | None = None
     ):
-        if app_commands is None:
-            cmds = {x.name: x.id for x in await self.fetch_commands()}
-        else:
-            cmds = {x.name: x.id for x in app_commands}
+        if app_commands is not None:
+            self.command_ids = {x.name: x.id for x in app_commands}
+        elif self.command_ids is None:
+            self.command_ids = {x.name: x.id for x in await self.fetch_commands()}
+        cmds = self.command_ids
 
         for cmd in (cog or self).walk_commands():
             cmd_id = cmds.get(cmd.root_parent.name if cmd.root_parent else cmd.name, None)
@@ -167,14 +249,109 @@ class CommandTree[Bot: BallsDexBot](app_commands.CommandTree[Bot]):
                 continue
             cmd.extras["mention"] = f"</{cmd.qualified_name}:{cmd_id}>"
 
-    async def sync(self, *, guild: discord.abc.Snowflake | None = None) -> list[app_commands.AppCommand]:
-        app_commands = await super().sync(guild=guild)
-        if not guild:
-            # assign the mentions
-            await self.load_command_mentions(app_commands)
-            return app_commands
+    async def get_tree_hash(self) -> str:
+        """
+        Return a hash of the global commands as they would be sent to Discord, translations included.
+        """
+        commands = self.get_commands()
+        if translator := self.translator:
+            payload = [await command.get_translated_payload(self, translator) for command in commands]
+        else:
+            payload = [command.to_dict(self) for command in commands]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def load_stored_command_ids(self) -> bool:
+        """
+        Assign the command mentions from the IDs stored by the last sync, without calling Discord.
+        Returns `False` if no sync was stored.
+        """
+        state = await CommandTreeState.objects.filter(application_id=self.client.application_id).afirst()
+        if state is None or not state.command_ids:
+            return False
+        self.command_ids = state.command_ids
+        await self.load_command_mentions()
+        return True
 
-        return app_commands
+    async def sync_if_changed(self, *, force: bool = False) -> bool:
+        """
+        Sync the global commands only if they changed since the last sync of any cluster, otherwise
+        restore the command mentions from the stored IDs. Only one cluster syncs at a time.
+
+        Parameters
+        ----------
+        force: bool
+            Sync even if the hash of the commands matches the last sync, for when the commands
+            registered on Discord no longer match what was synced.
+
+        Returns
+        -------
+        bool
+            Whether the commands were synced.
+        """
+        digest = await self.get_tree_hash()
+        state, _ = await CommandTreeState.objects.aget_or_create(application_id=self.client.application_id)
+        delay = 10
+        while force or state.hash != digest:
+            # lease the sync to this cluster, expiring in case the process is killed while syncing
+            now = timezone.now()
+            claimed = (
+                await CommandTreeState.objects.filter(pk=state.pk)
+                .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+                .aupdate(locked_until=now + timedelta(seconds=self.sync_lock_duration))
+            )
+            if not claimed:
+                # another cluster is syncing, its tree may be the same as ours
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+                await state.arefresh_from_db()
+                continue
+            await state.arefresh_from_db()
+            if state.hash == digest and not force:
+                # synced by another cluster right before we claimed the lock
+                await CommandTreeState.objects.filter(pk=state.pk).aupdate(locked_until=None)
+                break
+            try:
+                await self.sync()
+            finally:
+                await CommandTreeState.objects.filter(pk=state.pk).aupdate(locked_until=None)
+            return True
+
+        self.command_ids = state.command_ids
+        await self.load_command_mentions()
+        return False
+
+    async def check_drift(self) -> bool:
+        """
+        Compare the global commands registered on Discord with the last sync, and sync again if
+        they were edited or deleted outside of the bot.
+
+        Returns
+        -------
+        bool
+            Whether the commands were synced.
+        """
+        registered = {x.name: x.id for x in await self.fetch_commands()}
+        state = await CommandTreeState.objects.filter(application_id=self.client.application_id).afirst()
+        if state is not None and registered == state.command_ids:
+            return False
+        log.warning("Global commands registered on Discord differ from the last sync, syncing again.")
+        return await self.sync_if_changed(force=True)
+
+    async def sync(self, *, guild: discord.abc.Snowflake | None = None) -> list[app_commands.AppCommand]:
+        if guild:
+            return await super().sync(guild=guild)
+
+        digest = await self.get_tree_hash()
+        synced = await super().sync()
+
+        # assign the mentions
+        await self.load_command_mentions(synced)
+        # and skip the next syncs until the tree changes
+        await CommandTreeState.objects.aupdate_or_create(
+            application_id=self.client.application_id,
+            defaults={"hash": digest, "command_ids": self.command_ids, "synced_at": timezone.now()},
+        )
+        return synced
 
 
 class BallsDexBot(commands.AutoShardedBot):
@@ -188,6 +365,7 @@ class BallsDexBot(commands.AutoShardedBot):
         disable_message_content: bool = False,
         disable_time_check: bool = False,
         skip_tree_sync: bool = False,
+        prerender_cards: bool = False,
         gateway_url: str | None = None,
         dev: bool = False,
         **options,
@@ -213,17 +391,33 @@ class BallsDexBot(commands.AutoShardedBot):
             command_prefix, intents=intents, tree_cls=CommandTree, help_command=HelpCommand(width=100), **options
         )
         self.tree: CommandTree[Self]
+        if settings.prometheus_enabled:
+            instrument_http(self.http)
         self.tree.disable_time_check = disable_time_check
         self.skip_tree_sync = skip_tree_sync
+        self.prerender_cards = prerender_cards
         self.gateway_url = gateway_url
 
         self.dev = dev
         self.prometheus_server: PrometheusServer | None = None
+        self.render_service = RenderService(
+            settings.card_render_workers, settings.card_render_queue_size, settings.card_render_timeout
+        )
+
+        self.cache_sync = CacheSync(self)
 
         self.tree.error(self.on_application_command_error)
 
+        # guilds where messages are read, set by the countryballs package. Messages from other guilds
+        # are dropped before discord.py builds them, except for possible commands
+        self.message_guilds: Container[int] | None = None
+        self._parse_message_create = self._connection.parsers["MESSAGE_CREATE"]
+        self._connection.parsers["MESSAGE_CREATE"] = self.parse_message_create
+
         self._shutdown = 0
         self.startup_time: datetime | None = None
+        self.startup_timings: dict[str, float] = {}
+        self.first_interaction_handled = False
         self.application_emojis: dict[int, discord.Emoji] = {}
         self.blacklist: set[int] = set()
         self.blacklist_guild: set[int] = set()
@@ -233,6 +427,32 @@ class BallsDexBot(commands.AutoShardedBot):
 
         self.owner_ids: set[int]
 
+    def message_drop_reason(self, data: dict[str, Any]) -> str | None:
+        """
+        Return why a raw message payload can be ignored, or `None` if it must be processed.
+        """
+        if self.message_guilds is None or "guild_id" not in data:
+            return None
+        author = data["author"]
+        # prefixed commands, mentions and the replies to the owners' dev commands
+        if data.get("content", "").startswith((settings.prefix, "<@")) or int(author["id"]) in self.owner_ids:
+            return None
+        if author.get("bot") or data.get("webhook_id"):
+            return "bot"
+        guild_id = int(data["guild_id"])
+        if guild_id not in self.message_guilds:
+            return "no_spawn"
+        if guild_id in self.blacklist_guild:
+            return "blacklisted"
+        return None
+
+    def parse_message_create(self, data: dict[str, Any]):
+        # called for every message the bot can see, before any object is built or cached
+        reason = self.message_drop_reason(data)
+        gateway_messages.labels(result=reason or "accepted").inc()
+        if reason is None:
+            self._parse_message_create(data)
+
     async def start_prometheus_server(self):
         self.prometheus_server = PrometheusServer(self, settings.prometheus_host, settings.prometheus_port)
         await self.prometheus_server.run()
@@ -240,48 +460,49 @@ class BallsDexBot(commands.AutoShardedBot):
     def get_emoji(self, id: int) -> discord.Emoji | None:
         return self.application_emojis.get(id) or super().get_emoji(id)
 
+    async def load_models(self):
+        """
+        Reload the cached models and blacklists from the database.
+        """
+
+        def load():
+            # one trip to the database thread for every model, instead of one per model and chunk
+            return (
+                {x.pk: x for x in Ball.objects.all()},
+                {x.pk: x for x in Regime.objects.all()},
+                {x.pk: x for x in Economy.objects.all()},
+                {x.pk: x for x in Special.objects.all()},
+                set(BlacklistedID.objects.values_list("discord_id", flat=True)),
+                set(BlacklistedGuild.objects.values_list("discord_id", flat=True)),
+            )
+
+        models = await sync_to_async(load)()
+        # the caches are replaced without awaiting in between, they are never seen half-loaded
+        for cache, values in zip((balls, regimes, economies, specials), models[:4]):
+            cache.clear()
+            cache.update(values)
+        self.blacklist, self.blacklist_guild = models[4:]
+
     async def load_cache(self):
         table = Table(box=box.SIMPLE)
         table.add_column("Model", style="cyan")
         table.add_column("Count", justify="right", style="green")
 
+        emojis, _ = await asyncio.gather(self.fetch_application_emojis(), self.load_models())
         self.application_emojis.clear()
-        for emoji in await self.fetch_application_emojis():
-            self.application_emojis[emoji.id] = emoji
+        self.application_emojis.update((emoji.id, emoji) for emoji in emojis)
 
-        balls.clear()
-        async for ball in Ball.objects.all():
-            balls[ball.pk] = ball
         table.add_row(settings.collectible_name.title() + "s", str(len(balls)))
-
-        regimes.clear()
-        async for regime in Regime.objects.all():
-            regimes[regime.pk] = regime
         table.add_row("Regimes", str(len(regimes)))
-
-        economies.clear()
-        async for economy in Economy.objects.all():
-            economies[economy.pk] = economy
         table.add_row("Economies", str(len(economies)))
-
-        specials.clear()
-        async for special in Special.objects.all():
-            specials[special.pk] = special
         table.add_row("Special events", str(len(specials)))
-
-        self.blacklist = set()
-        async for blacklisted_id in BlacklistedID.objects.all().only("discord_id"):
-            self.blacklist.add(blacklisted_id.discord_id)
         table.add_row("Blacklisted users", str(len(self.blacklist)))
-
-        self.blacklist_guild = set()
-        async for blacklisted_id in BlacklistedGuild.objects.all().only("discord_id"):
-            self.blacklist_guild.add(blacklisted_id.discord_id)
         table.add_row("Blacklisted guilds", str(len(self.blacklist_guild)))
 
         log.info("Cache loaded, summary displayed below:")
         console = Console()
         console.print(table)
+        self.dispatch("ballsdex_cache_loaded")
 
     async def gateway_healthy(self) -> bool:
         """Check whether or not the gateway proxy is ready and healthy."""
@@ -298,6 +519,9 @@ class BallsDexBot(commands.AutoShardedBot):
 
     async def setup_hook(self) -> None:
         await self.tree.set_translator(Translator())
+        self.render_service.start()
+        # listen before the cache is loaded in on_ready, so no change can be missed in between
+        self.cache_sync.start()
         log.info("Starting up with %s shards...", self.shard_count)
         if self.gateway_url is None:
             return
@@ -311,6 +535,12 @@ class BallsDexBot(commands.AutoShardedBot):
             log.warning("Gateway proxy is not ready yet, waiting 30 more seconds...")
             await asyncio.sleep(30)
 
+    async def close(self) -> None:
+        self.render_service.stop()
+        self.cache_sync.stop()
+        self.check_tree_drift.cancel()
+        await super().close()
+
     # override cog reload to reconfigure app command mentions
     async def add_cog(
         self,
@@ -328,12 +558,95 @@ class BallsDexBot(commands.AutoShardedBot):
             await self.tree.load_command_mentions(cog=cog)
         # otherwise, bot is still starting, that will be done with the sync
 
+    async def timed[T](self, phase: str, coro: Awaitable[T]) -> T:
+        """
+        Await the coroutine and record its duration in the startup timings.
+        """
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - start
+
+    async def log_owners(self):
+        if len(self.owner_ids) > 1:
+            log.info(f"{len(self.owner_ids)} users are set as bot owner.")
+        else:
+            log.info(f"{await self.fetch_user(next(iter(self.owner_ids)))} is the owner of this bot.")
+
+    async def load_package(self, name: str, path: str) -> bool:
+        try:
+            await self.timed(f"package {name}", self.load_extension(path))
+        except Exception:
+            log.error(f"Failed to load package {name}", exc_info=True)
+            return False
+        return True
+
+    async def load_packages(self):
+        log.info("Loading packages...")
+        await self.add_cog(Core(self))
+        if self.dev:
+            await self.add_cog(Dev())
+
+        packages = list(DEFAULT_PACKAGES)
+        for app in apps.get_app_configs():
+            if dpy_package := getattr(app, "dpy_package", None):
+                packages.append((app.label, dpy_package))
+
+        # sequentially in the configured order, which decides the order of the cogs and commands,
+        # and packages may depend on a previous one being loaded
+        loaded_packages = [name for name, path in packages if await self.load_package(name, path)]
+        if loaded_packages:
+            log.info(f"Packages loaded: {', '.join(loaded_packages)}")
+        else:
+            log.info("No package loaded.")
+
+    async def prerender(self):
+        log.info("Pre-rendering cards...")
+        report = await prerender_cards(base_card_specs())
+        log.info(f"Pre-rendered {report.total - report.failed}/{report.total} cards in {report.elapsed:.2f}s.")
+
+    async def start_metrics(self):
+        try:
+            await self.start_prometheus_server()
+        except Exception:
+            log.exception("Failed to start Prometheus server, stats will be unavailable.")
+
+    async def sync_tree(self):
+        log.info("Syncing global commands...")
+        if await self.tree.sync_if_changed():
+            log.info(f"Synced {len(self.tree.command_ids or ())} global commands.")
+        else:
+            log.info("Global commands did not change since the last sync, using the stored IDs.")
+
+    @tasks.loop(hours=6)
+    async def check_tree_drift(self):
+        if self.check_tree_drift.current_loop == 0:
+            return  # the tree was just synced on startup
+        try:
+            if await self.tree.check_drift():
+                log.info(f"Synced {len(self.tree.command_ids or ())} global commands.")
+        except Exception:
+            log.exception("Failed to check the global commands registered on Discord")
+
+    def report_startup(self):
+        table = Table(box=box.SIMPLE)
+        table.add_column("Startup phase", style="cyan")
+        table.add_column("Seconds", justify="right", style="green")
+        for phase, duration in self.startup_timings.items():
+            table.add_row(phase, f"{duration:.2f}")
+            startup_seconds.labels(phase=phase).set(duration)
+        log.info("Startup timings displayed below:")
+        Console().print(table)
+
     async def on_ready(self):
         if self.cogs != {}:
             return  # bot is reconnecting, no need to setup again
 
         if self.startup_time is None:
             self.startup_time = datetime.now()
+        self.startup_timings["connect"] = time.monotonic() - process_start
+        ready_start = time.perf_counter()
 
         assert self.user
         log.info(f"Successfully logged in as {self.user} ({self.user.id})!")
@@ -349,54 +662,44 @@ class BallsDexBot(commands.AutoShardedBot):
             self.owner_ids.add(self.application.owner.id)
         if settings.co_owners:
             self.owner_ids.update(settings.co_owners)
-        if len(self.owner_ids) > 1:
-            log.info(f"{len(self.owner_ids)} users are set as bot owner.")
-        else:
-            log.info(f"{await self.fetch_user(next(iter(self.owner_ids)))} is the owner of this bot.")
 
-        await self.load_cache()
+        # phases without dependencies between each other run concurrently
+        phases = [self.log_owners(), self.timed("cache", self.load_cache())]
+        if settings.prometheus_enabled:
+            phases.append(self.timed("prometheus", self.start_metrics()))
+        await asyncio.gather(*phases)
+
         grammar = "" if len(self.blacklist) == 1 else "s"
         if self.blacklist:
             log.info(f"{len(self.blacklist)} blacklisted user{grammar}.")
 
-        log.info("Loading packages...")
-        await self.add_cog(Core(self))
-        if self.dev:
-            await self.add_cog(Dev())
-
-        loaded_packages = []
-        packages = list(DEFAULT_PACKAGES)
-        for app in apps.get_app_configs():
-            if dpy_package := getattr(app, "dpy_package", None):
-                packages.append((app.label, dpy_package))
-
-        for package_name, path in packages:
-            try:
-                await self.load_extension(path)
-            except Exception:
-                log.error(f"Failed to load package {package_name}", exc_info=True)
-            else:
-                loaded_packages.append(package_name)
-        if loaded_packages:
-            log.info(f"Packages loaded: {', '.join(loaded_packages)}")
-        else:
-            log.info("No package loaded.")
+        phases = [self.timed("packages", self.load_packages())]
+        if self.prerender_cards:
+            phases.append(self.timed("prerender", self.prerender()))
+        await asyncio.gather(*phases)
 
         if not self.skip_tree_sync:
-            log.info("Syncing global commands...")
-            synced_commands = await self.tree.sync()
-            log.info(f"Synced {len(synced_commands)} global commands.")
+            await self.timed("tree sync", self.sync_tree())
+            # a single cluster checks that the commands were not modified outside of the bot
+            if 0 in (self.shard_ids or (0,)):
+                self.check_tree_drift.start()
         else:
             log.warning("Skipping command synchronization.")
+            if not await self.tree.load_stored_command_ids():
+                log.warning("No stored command IDs, command mentions will not be available.")
 
-        if settings.prometheus_enabled:
-            try:
-                await self.start_prometheus_server()
-            except Exception:
-                log.exception("Failed to start Prometheus server, stats will be unavailable.")
-
+        self.startup_timings["ready"] = time.perf_counter() - ready_start
+        self.report_startup()
         print(f"\n    [bold][red]{settings.bot_name} bot[/red] [green]is now operational![/green][/bold]\n")
 
+    async def on_interaction(self, interaction: discord.Interaction[Self]):
+        if self.first_interaction_handled:
+            return
+        self.first_interaction_handled = True
+        delay = time.monotonic() - process_start
+        first_interaction_seconds.set(delay)
+        log.info(f"First interaction received {delay:.2f}s after the process started.")
+
     async def blacklist_check(self, source: discord.Interaction[Self] | commands.Context[Self]) -> bool:
         if isinstance(source, discord.Interaction):
             user = source.user
@@ -502,6 +805,9 @@ class BallsDexBot(commands.AutoShardedBot):
                     case discord.NotFound(code=10062) | discord.NotFound(code=10015):
                         log.warning("Expired interaction", exc_info=exception.original)
 
+                    case RenderError():
+                        await context.send(exception.original.msg, ephemeral=True)
+
                     case _:
                         # still including traceback because it may be a programming error
                         await context.send(
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from django.db import models
+from prometheus_client import Counter
+
+from ballsdex.core.utils.owned_balls import owned_balls
+from ballsdex.core.utils.transformers import TTLModelTransformer
+from bd_models.models import Ball, Economy, Regime, Special, balls, economies, regimes, specials
+from bd_models.notify import PROCESS_ID, Change, listen_changes
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.core.cache_sync")
+cache_changes = Counter("cache_changes", "Cache changes received from other processes", ["model"])
+
+CACHES: dict[str, tuple[type[models.Model], dict[int, models.Model]]] = {
+    "ball": (Ball, balls),  # type: ignore
+    "regime": (Regime, regimes),  # type: ignore
+    "economy": (Economy, economies),  # type: ignore
+    "special": (Special, specials),  # type: ignore
+}
+
+
+class CacheSync:
+    """
+    Keep the cached models and blacklists up to date with the changes notified by the admin panel
+    and the other clusters, instead of reloading them entirely.
+
+    A `ballsdex_cache_update` event is dispatched with the model name and primary key of every
+    change applied, for the caches derived from these models.
+    """
+
+    def __init__(self, bot: "BallsDexBot"):
+        self.bot = bot
+        self.task: asyncio.Task | None = None
+        self.delay = 1
+        self.listened = False
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        TTLModelTransformer.live = False
+
+    async def run(self):
+        while True:
+            try:
+                async for change in listen_changes(on_listen=self.on_listen):
+                    await self.apply(change)
+            except Exception:
+                log.exception(f"Lost the cache change notifications, reconnecting in {self.delay}s")
+            TTLModelTransformer.live = False
+            await asyncio.sleep(self.delay)
+            self.delay = min(self.delay * 2, 300)
+
+    async def on_listen(self):
+        # changes made while disconnected were missed, and the cache may have been loaded before
+        # the first connection
+        if self.listened or self.bot.is_ready():
+            await self.bot.load_models()
+            TTLModelTransformer.invalidate_all()
+            owned_balls.clear()
+            self.bot.dispatch("ballsdex_cache_loaded")
+        self.listened = True
+        self.delay = 1
+        # only stop polling once notifications are actually received
+        TTLModelTransformer.live = True
+
+    async def apply(self, change: Change):
+        if change.get("origin") == PROCESS_ID:
+            return  # already applied by this process
+        name = change["model"]
+        cache_changes.labels(model=name).inc()
+        if name == "ownedballs":
+            owned_balls.discard(change["pk"])
+            return
+        if name == "blacklistedid" or name == "blacklistedguild":
+            blacklist = self.bot.blacklist if name == "blacklistedid" else self.bot.blacklist_guild
+            if change["discord_id"] is None:
+                return
+            if change["deleted"]:
+                blacklist.discard(change["discord_id"])
+            else:
+                blacklist.add(change["discord_id"])
+            return
+        if name not in CACHES:
+            return
+
+        model, cache = CACHES[name]
+        instance = None if change["deleted"] else await model.objects.filter(pk=change["pk"]).afirst()
+        if instance is None:
+            cache.pop(change["pk"], None)
+        else:
+            cache[change["pk"]] = instance
+        await TTLModelTransformer.apply_change(model, change["pk"])
+        log.debug(f"Applied cache change: {change}")
+        self.bot.dispatch("ballsdex_cache_update", name, change["pk"])
@@ -58,10 +58,10 @@ class Core(commands.Cog):
     @commands.is_owner()
     async def reloadtree(self, ctx: commands.Context, guild_id: int | None = None):
         """
-        Sync the application commands with Discord
+        Sync the application commands with Discord, even if they did not change since the last sync
         """
         if guild_id is None:
-            await self.bot.tree.sync()
+            await self.bot.tree.sync_if_changed(force=True)
         else:
             guild = discord.Object(id=guild_id)
             await self.bot.tree.sync(guild=guild)
@@ -7,6 +7,8 @@ import discord
 from discord.ui import Item
 from discord.ui.view import BaseView as DiscordBaseView
 
+from ballsdex.core.image_generator.render_service import RenderError
+
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
@@ -22,9 +24,13 @@ async def _error_handler(interaction: Interaction, error: Exception) -> bool:
     if isinstance(error, discord.NotFound) and error.code in UNKNOWN_INTERACTION:
         log.warning("Expired interaction", exc_info=error)
         return True
-    if not interaction.is_expired() and interaction.type != discord.InteractionType.autocomplete:
-        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
-        await send("An error occured. Contact support if this persists.", ephemeral=True)
+    if interaction.is_expired() or interaction.type == discord.InteractionType.autocomplete:
+        return False
+    send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+    if isinstance(error, RenderError):
+        await send(error.msg, ephemeral=True)
+        return True
+    await send("An error occured. Contact support if this persists.", ephemeral=True)
     return False
 
 
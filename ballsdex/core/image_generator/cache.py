@@ -0,0 +1,324 @@
+import logging
+import os
+import shutil
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Hashable
+
+from cachetools import LRUCache
+from PIL import Image
+
+log = logging.getLogger("ballsdex.core.image_generator.cache")
+
+
+class RenderCache:
+    """
+    A content-addressed cache of encoded images, with a bounded in-memory LRU tier in front of
+    an on-disk tier.
+
+    Keys are hexadecimal digests of every input used for rendering (see `CardSpec.cache_key`),
+    which means an entry can never become stale: a modified input results in a different key.
+    Unused entries are deleted from disk once the directory exceeds `disk_size`, least recently
+    used first (reading an entry refreshes its modification time).
+
+    Parameters
+    ----------
+    directory: Path | None
+        Directory where entries are persisted, created on the first write. If `None`, only the
+        memory tier is used.
+    memory_size: int
+        Maximum number of bytes kept in memory.
+    disk_size: int | None
+        Maximum number of bytes kept on disk. Unbounded if `None`.
+    """
+
+    def __init__(self, directory: Path | None, memory_size: int, disk_size: int | None = None):
+        self.directory = directory
+        self.memory: LRUCache[str, bytes] = LRUCache(maxsize=memory_size, getsizeof=len)
+        self.disk_size = disk_size
+        # bytes on disk measured by the last prune plus the writes since, None until measured
+        self.disk_usage: int | None = None
+        # renders happen in executors, cachetools is not thread-safe
+        self.lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        assert self.directory
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            data = self.memory.get(key)
+        if data is not None or self.directory is None:
+            return data
+
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            log.warning(f"Failed to read cached card {key}", exc_info=True)
+            return None
+        if self.disk_size is not None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass  # deleted by another process in the meantime
+        self._set_memory(key, data)
+        return data
+
+    def _set_memory(self, key: str, data: bytes):
+        if len(data) > self.memory.maxsize:
+            return
+        with self.lock:
+            self.memory[key] = data
+
+    def set(self, key: str, data: bytes):
+        self._set_memory(key, data)
+        if self.directory is None:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first to never expose a partial file to other processes
+            tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        except OSError:
+            log.warning(f"Failed to write cached card {key}", exc_info=True)
+            return
+
+        if self.disk_size is None:
+            return
+        with self.lock:
+            measured = self.disk_usage is not None
+            self.disk_usage = (self.disk_usage or 0) + len(data)
+            full = self.disk_usage > self.disk_size
+        if full or not measured:
+            self.prune()
+
+    def prune(self):
+        """
+        Delete the least recently used files until the disk tier is under 90% of `disk_size`.
+
+        The directory may be shared with other processes, so the usage is measured from the
+        files present rather than from the writes of this process.
+        """
+        if self.directory is None or self.disk_size is None:
+            return
+        entries: list[tuple[int, int, Path]] = []
+        for file in self.directory.glob("*/*"):
+            if file.suffix == ".tmp":
+                continue
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, file))
+        usage = sum(size for _, size, _ in entries)
+        if usage > self.disk_size:
+            target = self.disk_size * 9 // 10
+            entries.sort()
+            for _, size, file in entries:
+                if usage <= target:
+                    break
+                try:
+                    file.unlink(missing_ok=True)
+                except OSError:
+                    continue
+                usage -= size
+            log.debug(f"Pruned the card cache in {self.directory} to {usage} bytes")
+        with self.lock:
+            self.disk_usage = usage
+
+    def clear(self):
+        """
+        Drop every entry, in memory and on disk.
+        """
+        with self.lock:
+            self.memory.clear()
+            self.disk_usage = None
+        if self.directory is not None and self.directory.exists():
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def image_size(image: Image.Image) -> int:
+    """
+    Return the number of bytes used by a decoded image.
+    """
+    return image.width * image.height * len(image.getbands())
+
+
+class TemplateCache:
+    """
+    A cache of decoded base card layers (everything except the per-instance stats), kept in a
+    byte-bounded LRU in memory and stored on disk as fast-compressed PNG files.
+
+    Cached images are shared, copy them before drawing.
+
+    Parameters
+    ----------
+    directory: Path | None
+        Directory where templates are persisted. If `None`, only the memory tier is used.
+    memory_size: int
+        Maximum number of bytes of decoded images kept in memory. Each render worker has its own
+        cache, so this budget is used once per worker.
+    disk_size: int | None
+        Maximum number of bytes of encoded templates kept on disk. Unbounded if `None`.
+    """
+
+    def __init__(self, directory: Path | None, memory_size: int, disk_size: int | None = None):
+        self.images: LRUCache[str, Image.Image] = LRUCache(maxsize=memory_size, getsizeof=image_size)
+        self.files = RenderCache(directory, 0, disk_size)
+        self.lock = threading.Lock()
+
+    def _set_memory(self, key: str, image: Image.Image):
+        if image_size(image) > self.images.maxsize:
+            return
+        with self.lock:
+            self.images[key] = image
+
+    def get(self, key: str) -> Image.Image | None:
+        with self.lock:
+            image = self.images.get(key)
+        if image is not None:
+            return image
+
+        data = self.files.get(key)
+        if data is None:
+            return None
+        image = Image.open(BytesIO(data))
+        image.load()
+        self._set_memory(key, image)
+        return image
+
+    def set(self, key: str, image: Image.Image):
+        self._set_memory(key, image)
+        if self.files.directory is None:
+            return
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", compress_level=1)
+        self.files.set(key, buffer.getvalue())
+
+    def clear(self):
+        """
+        Drop every template, in memory and on disk.
+        """
+        with self.lock:
+            self.images.clear()
+        self.files.clear()
+
+
+class _EvictionCountingCache(LRUCache):
+    evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class AssetCache:
+    """
+    A cache of decoded source images (backgrounds, artworks and icons) converted to RGBA, kept in
+    a byte-bounded LRU in memory.
+
+    Entries are keyed by path and checked against the file's modification time on every lookup,
+    so replacing a file from the admin panel is picked up immediately.
+
+    Cached images are shared, copy them before drawing.
+
+    This cache mostly lives in rendering processes whose metrics are not exported, the number of
+    hits, misses and evictions is collected with `take_stats` and reported by the parent process.
+
+    Parameters
+    ----------
+    memory_size: int
+        Maximum number of bytes of decoded images kept in memory. Each render worker has its own
+        cache, so this budget is used once per worker.
+    """
+
+    def __init__(self, memory_size: int):
+        self.images: _EvictionCountingCache = _EvictionCountingCache(
+            maxsize=memory_size, getsizeof=lambda x: image_size(x[1])
+        )
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Image.Image:
+        """
+        Return the decoded RGBA image at the given path.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            entry = self.images.get(path)
+            if entry is not None and entry[0] == mtime:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with Image.open(path) as file:
+            image = file.convert("RGBA")
+        if image_size(image) <= self.images.maxsize:
+            with self.lock:
+                self.images[path] = (mtime, image)
+        return image
+
+    def take_stats(self) -> tuple[int, int, int]:
+        """
+        Return the number of hits, misses and evictions since the last call.
+        """
+        with self.lock:
+            stats = (self.hits, self.misses, self.images.evictions)
+            self.hits = self.misses = self.images.evictions = 0
+        return stats
+
+    def clear(self):
+        """
+        Drop every decoded image.
+        """
+        with self.lock:
+            self.images.clear()
+
+
+type TextLayer = tuple[Image.Image, tuple[int, int]]
+
+
+class TextLayerCache:
+    """
+    A cache of pre-rasterised text layers (transparent images cropped to their content, with
+    their position on the card), kept in a byte-bounded LRU in memory.
+
+    Cached images are shared, only use them as a source for compositing.
+
+    Parameters
+    ----------
+    memory_size: int
+        Maximum number of bytes of rasterised layers kept in memory.
+    """
+
+    def __init__(self, memory_size: int):
+        self.layers: LRUCache[Hashable, list[TextLayer]] = LRUCache(
+            maxsize=memory_size, getsizeof=lambda x: sum(image_size(image) for image, _ in x) or 1
+        )
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> list[TextLayer] | None:
+        with self.lock:
+            return self.layers.get(key)
+
+    def set(self, key: Hashable, layers: list[TextLayer]):
+        if sum(image_size(image) for image, _ in layers) > self.layers.maxsize:
+            return
+        with self.lock:
+            self.layers[key] = layers
+
+    def clear(self):
+        """
+        Drop every text layer.
+        """
+        with self.lock:
+            self.layers.clear()
@@ -1,11 +1,18 @@
+import functools
+import hashlib
 import os
 import textwrap
+import time
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, replace
+from io import BytesIO
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterator, Self
 
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from django.conf import settings as django_settings
+from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageStat
 
-from settings.models import settings
+from .cache import AssetCache, RenderCache, TemplateCache, TextLayer, TextLayerCache
 
 if TYPE_CHECKING:
     from bd_models.models import BallInstance
@@ -39,103 +46,472 @@ capacity_description_font = ImageFont.truetype(str(SOURCES_PATH / "OpenSans-Semi
 stats_font = ImageFont.truetype(str(SOURCES_PATH / "Bobby Jones Soft.otf"), 130)
 credits_font = ImageFont.truetype(str(SOURCES_PATH / "arial.ttf"), 40)
 
-credits_color_cache = {}
+# background brightness keyed by a digest of the file's content
+credits_brightness_cache: dict[str, float] = {}
 
+# divisors of the card's dimensions available for compact renders
+CARD_SCALES = (1, 2, 4)
 
-def get_credit_color(image: Image.Image, region: tuple) -> tuple:
-    image = image.crop(region)
-    brightness = sum(image.convert("L").getdata()) / image.width / image.height  # type: ignore
+# seconds spent in each drawing stage, only recorded within `record_stages`
+stage_timings: dict[str, float] | None = None
+
+# bump this when modifying the drawing code to invalidate the cached cards
+RENDERER_VERSION = 2
+cache_dir: Path | None = getattr(django_settings, "CACHE_DIR", None)
+render_cache = RenderCache(
+    cache_dir / "cards" if cache_dir else None,
+    getattr(django_settings, "CARD_CACHE_MEMORY_SIZE", 32 * 1024 * 1024),
+    getattr(django_settings, "CARD_CACHE_DISK_SIZE", 2 * 1024 * 1024 * 1024),
+)
+template_cache = TemplateCache(
+    cache_dir / "templates" if cache_dir else None,
+    getattr(django_settings, "CARD_TEMPLATE_CACHE_MEMORY_SIZE", 64 * 1024 * 1024),
+    getattr(django_settings, "CARD_TEMPLATE_CACHE_DISK_SIZE", 1024 * 1024 * 1024),
+)
+asset_cache = AssetCache(getattr(django_settings, "CARD_ASSET_CACHE_MEMORY_SIZE", 64 * 1024 * 1024))
+text_layer_cache = TextLayerCache(getattr(django_settings, "CARD_TEXT_CACHE_MEMORY_SIZE", 32 * 1024 * 1024))
+
+
+@dataclass(frozen=True, slots=True)
+class CardEncoding:
+    """
+    How a rendered card is encoded before being sent.
+
+    Attributes
+    ----------
+    format: str
+        One of `WEBP`, `AVIF`, `PNG` or `JPEG`.
+    quality: int
+        Quality from 0 to 100, ignored for PNG.
+    effort: int
+        Compression effort from 0 (fastest) to 9 (smallest output). Mapped to `method` for WEBP,
+        `speed` for AVIF, `compress_level` for PNG and `optimize` for JPEG.
+    lossless: bool
+        Whether to encode without quality loss, if the format allows it.
+    width: int | None
+        Downscale the card to this width, keeping the aspect ratio. Full size if `None`.
+    """
+
+    format: str = "WEBP"
+    quality: int = 80
+    effort: int = 4
+    lossless: bool = False
+    width: int | None = None
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "JPEG" else self.format.lower()
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """
+        Apply the downscaling and color mode conversion required before saving the image.
+        """
+        if self.width and self.width < image.width:
+            image = image.resize((self.width, round(image.height * self.width / image.width)), Image.Resampling.LANCZOS)
+        if self.format == "JPEG":
+            image = image.convert("RGB")
+        return image
+
+    def save_kwargs(self) -> dict[str, Any]:
+        """
+        Return the keyword arguments to pass to `Image.save`.
+        """
+        match self.format:
+            case "AVIF":
+                if self.lossless:
+                    return {"format": "AVIF", "quality": 100, "subsampling": "4:4:4", "speed": max(10 - self.effort, 0)}
+                return {"format": "AVIF", "quality": self.quality, "speed": max(10 - self.effort, 0)}
+            case "PNG":
+                return {"format": "PNG", "compress_level": min(self.effort, 9)}
+            case "JPEG":
+                if self.lossless:
+                    return {"format": "JPEG", "quality": 100, "subsampling": 0, "optimize": self.effort >= 5}
+                return {"format": "JPEG", "quality": self.quality, "optimize": self.effort >= 5}
+            case _:
+                return {
+                    "format": "WEBP",
+                    "quality": self.quality,
+                    "method": min(self.effort, 6),
+                    "lossless": self.lossless,
+                }
+
+
+@dataclass(frozen=True, slots=True)
+class CardSpec:
+    """
+    Every input that affects the rendering of a card. Two equal specs always produce the same
+    image, which makes them usable as a cache key.
+
+    Use `CardSpec.from_instance` to build one from a `BallInstance`.
+    """
+
+    title: str
+    capacity_name: str
+    capacity_description: str
+    credits: str
+    special_credits: str | None
+    card_name: str
+    background: str
+    background_brightness: float | None
+    artwork: str
+    icon: str | None
+    rarity: float | None
+    health: int
+    attack: int
+    encoding: CardEncoding = CardEncoding()
+    scale: int = 1
+
+    def __post_init__(self):
+        if self.scale not in CARD_SCALES:
+            raise ValueError(f"Card scale must be one of {CARD_SCALES}, not {self.scale}")
+
+    @classmethod
+    def from_instance(cls, ball_instance: "BallInstance", *, scale: int = 1) -> Self:
+        """
+        Build the spec of a ball instance's card.
+
+        Parameters
+        ----------
+        ball_instance: BallInstance
+            The instance to render.
+        scale: int
+            Divide the card's dimensions by this value for a cheaper, compact render. Must be one
+            of `CARD_SCALES`.
+        """
+        # imported here since rendering processes do not load Django models
+        from settings.models import settings
+
+        ball = ball_instance.countryball
+        card_name = ball.cached_regime.name
+        special_credits = None
+        if special_image := ball_instance.special_card:
+            card_name = getattr(ball_instance.specialcard, "name", card_name)
+            background = special_image.path
+            # not precomputed when the collection card is used as the background
+            brightness = ball_instance.specialcard.background_brightness if ball_instance.specialcard else None
+            if ball_instance.specialcard and ball_instance.specialcard.credits:
+                special_credits = ball_instance.specialcard.credits
+        else:
+            background = ball.cached_regime.background.path
+            brightness = ball.cached_regime.background_brightness
+        economy = ball.cached_economy
+        return cls(
+            title=ball.short_name or ball.country,
+            capacity_name=ball.capacity_name,
+            capacity_description=ball.capacity_description,
+            credits=ball.credits,
+            special_credits=special_credits,
+            card_name=card_name,
+            background=background,
+            background_brightness=brightness,
+            artwork=ball.collection_card.path,
+            icon=economy.icon.path if economy else None,
+            rarity=ball.rarity if settings.show_rarity else None,
+            health=ball_instance.health,
+            attack=ball_instance.attack,
+            encoding=CardEncoding(
+                format=settings.card_format,
+                quality=settings.card_quality,
+                effort=settings.card_encoding_effort,
+                lossless=settings.card_lossless,
+                width=settings.card_output_width,
+            ),
+            scale=scale,
+        )
+
+    def cache_key(self) -> str:
+        """
+        Return a digest of this spec, including the state of the image files on disk.
+        """
+        digest = hashlib.blake2b(repr((RENDERER_VERSION, astuple(self))).encode(), digest_size=20)
+        for path in (self.background, self.artwork, self.icon):
+            if path is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return digest.hexdigest()
+
+
+@contextmanager
+def record_stages() -> Iterator[dict[str, float]]:
+    """
+    Record the number of seconds spent in each stage of the card drawing in the yielded dict.
+    Used for benchmarking, this is not thread-safe.
+    """
+    global stage_timings
+    stage_timings = {}
+    try:
+        yield stage_timings
+    finally:
+        stage_timings = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    if stage_timings is None:
+        yield
+        return
+    t1 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_timings[name] = stage_timings.get(name, 0) + time.perf_counter() - t1
+
+
+def get_brightness(image: Image.Image) -> float:
+    """
+    Return the average brightness (0-255) of the bottom of a background, where the credits are.
+    """
+    region = image.crop((0, int(image.height * 0.8), image.width, image.height))
+    return ImageStat.Stat(region.convert("L")).mean[0]
+
+
+def get_background_brightness(path: str) -> float:
+    """
+    Return the brightness of the background at the given path, cached by the file's content.
+    Used when it was not precomputed on the model.
+    """
+    with open(path, "rb") as file:
+        digest = hashlib.file_digest(file, "blake2b").hexdigest()
+    if (brightness := credits_brightness_cache.get(digest)) is None:
+        brightness = get_brightness(asset_cache.get(path))
+        credits_brightness_cache[digest] = brightness
+    return brightness
+
+
+def get_credit_color(brightness: float) -> tuple:
     return (0, 0, 0, 255) if brightness > 100 else (255, 255, 255, 255)
 
 
+@functools.cache
+def scaled_font(font: ImageFont.FreeTypeFont, scale: int) -> ImageFont.FreeTypeFont:
+    """
+    Return a variant of the given font for a card drawn at `1/scale` of its size.
+    """
+    if scale == 1:
+        return font
+    return font.font_variant(size=font.size // scale)
+
+
+def scaled_xy(xy: tuple[int, int], scale: int) -> tuple[int, int]:
+    return (xy[0] // scale, xy[1] // scale)
+
+
+def scaled_stroke(width: int, scale: int) -> int:
+    # keep a thin outline on compact cards, the text is unreadable without it
+    return max(width // scale, 1) if width else 0
+
+
 def draw_card(ball_instance: "BallInstance") -> tuple[Image.Image, dict[str, Any]]:
-    ball = ball_instance.countryball
-    ball_health = (237, 115, 101, 255)
-    ball_credits = ball.credits
-    special_credits = ""
-    card_name = ball.cached_regime.name
-    if special_image := ball_instance.special_card:
-        card_name = getattr(ball_instance.specialcard, "name", card_name)
-        image = Image.open(special_image)
-        if ball_instance.specialcard and ball_instance.specialcard.credits:
-            special_credits += f" • Special Author: {ball_instance.specialcard.credits}"
-    else:
-        image = Image.open(ball.cached_regime.background)
-    image = image.convert("RGBA")
-    icon = Image.open(ball.cached_economy.icon).convert("RGBA") if ball.cached_economy else None
-
-    draw = ImageDraw.Draw(image)
-    draw.text((50, 20), ball.short_name or ball.country, font=title_font, stroke_width=2, stroke_fill=(0, 0, 0, 255))
-
-    cap_name = textwrap.wrap(f"Ability: {ball.capacity_name}", width=26)
+    return draw_card_from_spec(CardSpec.from_instance(ball_instance))
+
+
+def draw_card_template(spec: CardSpec) -> Image.Image:
+    """
+    Draw the base card layer, which is everything but the stats of the instance. The result is
+    the same for every instance of a ball sharing the same background and economy.
+    """
+    scale = spec.scale
+    special_credits = f" • Special Author: {spec.special_credits}" if spec.special_credits else ""
+    with stage("open"):
+        image = asset_cache.get(spec.background)
+        if scale == 1:
+            image = image.copy()
+        else:
+            image = image.resize((image.width // scale, image.height // scale), Image.Resampling.BILINEAR)
+        icon = asset_cache.get(spec.icon) if spec.icon else None
+        artwork = asset_cache.get(spec.artwork)
+
+    with stage("text"):
+        brightness = spec.background_brightness
+        if brightness is None:
+            brightness = get_background_brightness(spec.background)
+        credits_color = get_credit_color(brightness)
+
+        for layer, position in get_text_layers(spec):
+            image.alpha_composite(layer, position)
+
+        draw = ImageDraw.Draw(image)
+        if spec.rarity is not None:
+            draw.text(
+                scaled_xy((1200, 50), scale),
+                str(spec.rarity),
+                font=scaled_font(stats_font, scale),
+                stroke_width=scaled_stroke(2, scale),
+                stroke_fill=(0, 0, 0, 255),
+            )
+        draw.text(
+            scaled_xy((30, 1870), scale),
+            # Modifying the line below is breaking the licence as you are removing credits
+            # If you don't want to receive a DMCA, just don't
+            f"Created by El Laggron{special_credits}\nArtwork author: {spec.credits}",
+            font=scaled_font(credits_font, scale),
+            fill=credits_color,
+            stroke_width=0,
+            stroke_fill=(255, 255, 255, 255),
+        )
+
+    corners = (scaled_xy(CORNERS[0], scale), scaled_xy(CORNERS[1], scale))
+    with stage("fit"):
+        artwork = ImageOps.fit(artwork, [b - a for a, b in zip(*corners)])  # type: ignore
+        if icon:
+            icon = ImageOps.fit(icon, scaled_xy((192, 192), scale))
+
+    with stage("paste"):
+        image.paste(artwork, corners[0])
+        if icon:
+            image.paste(icon, scaled_xy((1200, 30), scale), mask=icon)
+
+    return image
+
+
+def crop_layer(layer: Image.Image) -> TextLayer | None:
+    if (bbox := layer.getbbox()) is None:
+        return None
+    return layer.crop(bbox), (bbox[0], bbox[1])
+
+
+def draw_text_layers(spec: CardSpec) -> list[TextLayer]:
+    """
+    Rasterise the title, ability name and ability description on transparent layers cropped to
+    their content. Those only depend on the ball, unlike the rest of the card's text.
+    """
+    scale = spec.scale
+    size = (WIDTH // scale, HEIGHT // scale)
+
+    title = Image.new("RGBA", size)
+    draw = ImageDraw.Draw(title)
+    draw.text(
+        scaled_xy((50, 20), scale),
+        spec.title,
+        font=scaled_font(title_font, scale),
+        stroke_width=scaled_stroke(2, scale),
+        stroke_fill=(0, 0, 0, 255),
+    )
+
+    ability = Image.new("RGBA", size)
+    draw = ImageDraw.Draw(ability)
+    cap_name = textwrap.wrap(f"Ability: {spec.capacity_name}", width=26)
 
     for i, line in enumerate(cap_name):
         draw.text(
-            (100, 1050 + 100 * i),
+            scaled_xy((100, 1050 + 100 * i), scale),
             line,
-            font=capacity_name_font,
+            font=scaled_font(capacity_name_font, scale),
             fill=(230, 230, 230, 255),
-            stroke_width=2,
+            stroke_width=scaled_stroke(2, scale),
             stroke_fill=(0, 0, 0, 255),
         )
 
     capacity_description_lines = (
         wrapped_line
-        for newline in ball.capacity_description.splitlines()
+        for newline in spec.capacity_description.splitlines()
         for wrapped_line in textwrap.wrap(newline, 32)
     )
 
     for i, line in enumerate(capacity_description_lines):
         draw.text(
-            (60, 1100 + 100 * len(cap_name) + 80 * i),
+            scaled_xy((60, 1100 + 100 * len(cap_name) + 80 * i), scale),
             line,
-            font=capacity_description_font,
-            stroke_width=1,
+            font=scaled_font(capacity_description_font, scale),
+            stroke_width=scaled_stroke(1, scale),
             stroke_fill=(0, 0, 0, 255),
         )
 
-    draw.text(
-        (320, 1670),
-        str(ball_instance.health),
-        font=stats_font,
-        fill=ball_health,
-        stroke_width=1,
-        stroke_fill=(0, 0, 0, 255),
-    )
-    draw.text(
-        (1120, 1670),
-        str(ball_instance.attack),
-        font=stats_font,
-        fill=(252, 194, 76, 255),
-        stroke_width=1,
-        stroke_fill=(0, 0, 0, 255),
-        anchor="ra",
-    )
-    if settings.show_rarity:
-        draw.text((1200, 50), str(ball.rarity), font=stats_font, stroke_width=2, stroke_fill=(0, 0, 0, 255))
-    if card_name in credits_color_cache:
-        credits_color = credits_color_cache[card_name]
-    else:
-        credits_color = get_credit_color(image, (0, int(image.height * 0.8), image.width, image.height))
-        credits_color_cache[card_name] = credits_color
-    draw.text(
-        (30, 1870),
-        # Modifying the line below is breaking the licence as you are removing credits
-        # If you don't want to receive a DMCA, just don't
-        f"Created by El Laggron{special_credits}\nArtwork author: {ball_credits}",
-        font=credits_font,
-        fill=credits_color,
-        stroke_width=0,
-        stroke_fill=(255, 255, 255, 255),
-    )
+    return [layer for layer in map(crop_layer, (title, ability)) if layer is not None]
+
+
+def get_text_layers(spec: CardSpec) -> list[TextLayer]:
+    """
+    Return the cached text layers of this spec, rasterising them if needed.
+    """
+    key = (spec.title, spec.capacity_name, spec.capacity_description, spec.scale)
+    if (layers := text_layer_cache.get(key)) is None:
+        layers = draw_text_layers(spec)
+        text_layer_cache.set(key, layers)
+    return layers
+
+
+def get_card_template(spec: CardSpec) -> Image.Image:
+    """
+    Return the cached base card layer for this spec, drawing it if needed.
+
+    The returned image is shared and must not be modified.
+    """
+    key = replace(spec, health=0, attack=0, encoding=CardEncoding()).cache_key()
+    if (template := template_cache.get(key)) is None:
+        template = draw_card_template(spec)
+        template_cache.set(key, template)
+    return template
+
+
+def draw_card_from_spec(spec: CardSpec, *, cached: bool = True) -> tuple[Image.Image, dict[str, Any]]:
+    """
+    Draw the full card of the given spec, returning the image and the arguments to save it with.
+
+    If `cached` is `False`, the base layer is always drawn from scratch.
+    """
+    image = get_card_template(spec).copy() if cached else draw_card_template(spec)
+
+    with stage("stats"):
+        draw = ImageDraw.Draw(image)
+        draw.text(
+            scaled_xy((320, 1670), spec.scale),
+            str(spec.health),
+            font=scaled_font(stats_font, spec.scale),
+            fill=(237, 115, 101, 255),
+            stroke_width=scaled_stroke(1, spec.scale),
+            stroke_fill=(0, 0, 0, 255),
+        )
+        draw.text(
+            scaled_xy((1120, 1670), spec.scale),
+            str(spec.attack),
+            font=scaled_font(stats_font, spec.scale),
+            fill=(252, 194, 76, 255),
+            stroke_width=scaled_stroke(1, spec.scale),
+            stroke_fill=(0, 0, 0, 255),
+            anchor="ra",
+        )
+
+    with stage("encode"):
+        image = spec.encoding.prepare(image)
+    return image, spec.encoding.save_kwargs()
+
+
+def render_card(spec: CardSpec) -> bytes:
+    """
+    Return the encoded card for the given spec, from the cache if possible, without touching
+    Pillow on a cache hit.
+    """
+    key = spec.cache_key()
+    if (data := render_cache.get(key)) is not None:
+        return data
+
+    image, kwargs = draw_card_from_spec(spec)
+    data = encode_card(image, kwargs)
+    image.close()
+    render_cache.set(key, data)
+    return data
+
+
+def encode_card(image: Image.Image, kwargs: dict[str, Any]) -> bytes:
+    with stage("encode"):
+        buffer = BytesIO()
+        image.save(buffer, **kwargs)
+        return buffer.getvalue()
 
-    artwork = Image.open(ball.collection_card).convert("RGBA")
-    image.paste(ImageOps.fit(artwork, artwork_size), CORNERS[0])  # type: ignore
 
-    if icon:
-        icon = ImageOps.fit(icon, (192, 192))
-        image.paste(icon, (1200, 30), mask=icon)
-        icon.close()
-    artwork.close()
+def prerender_card(spec: CardSpec) -> float:
+    """
+    Fill the template cache for the given spec, returning the number of seconds taken.
 
-    return image, {"format": "WEBP"}
+    Only the base layer is drawn: real instances have stat bonuses, so a full card rendered here
+    would almost never be hit. This is meant to be run in worker processes to warm the on-disk
+    cache.
+    """
+    t1 = time.perf_counter()
+    get_card_template(spec)
+    return time.perf_counter() - t1
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from django.utils import timezone
+
+from bd_models.models import BallInstance, balls, specials
+
+from .image_gen import CardSpec, prerender_card
+
+log = logging.getLogger("ballsdex.core.image_generator.prerender")
+
+
+@dataclass
+class PrerenderReport:
+    """
+    Summary of a pre-rendering run.
+    """
+
+    total: int = 0
+    failed: int = 0
+    elapsed: float = 0
+    timings: list[float] = field(default_factory=list)
+
+    @property
+    def average(self) -> float:
+        return sum(self.timings) / len(self.timings) if self.timings else 0
+
+    @property
+    def slowest(self) -> float:
+        return max(self.timings, default=0)
+
+
+def base_card_specs() -> list[CardSpec]:
+    """
+    List the base card of every enabled ball, with its regime background and with the background
+    of every special event currently active.
+
+    The ball, regime, economy and special caches must be loaded.
+    """
+    now = timezone.now()
+    active_specials = [
+        x
+        for x in specials.values()
+        # handle null start/end dates with infinity times
+        if (x.start_date or datetime.min.replace(tzinfo=timezone.get_current_timezone()))
+        <= now
+        <= (x.end_date or datetime.max.replace(tzinfo=timezone.get_current_timezone()))
+    ]
+    specs: list[CardSpec] = []
+    for ball in balls.values():
+        if not ball.enabled:
+            continue
+        for special in (None, *active_specials):
+            specs.append(CardSpec.from_instance(BallInstance(ball=ball, special=special)))
+    return specs
+
+
+async def prerender_cards(
+    specs: list[CardSpec], *, workers: int | None = None, progress: Callable[[int, int], None] | None = None
+) -> PrerenderReport:
+    """
+    Draw the base layer of the given cards in a pool of processes to fill the template cache.
+
+    Parameters
+    ----------
+    specs: list[CardSpec]
+        The cards to render.
+    workers: int | None
+        Number of processes to use. Defaults to the number of CPU cores.
+    progress: Callable[[int, int], None] | None
+        Called with the number of completed cards and the total after each card.
+
+    Returns
+    -------
+    PrerenderReport
+        The timings of this run.
+    """
+    report = PrerenderReport(total=len(specs))
+    loop = asyncio.get_running_loop()
+    t1 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [loop.run_in_executor(pool, prerender_card, spec) for spec in specs]
+        for i, future in enumerate(asyncio.as_completed(futures), start=1):
+            try:
+                report.timings.append(await future)
+            except Exception:
+                log.warning("Failed to pre-render a card", exc_info=True)
+                report.failed += 1
+            if progress:
+                progress(i, report.total)
+    report.elapsed = time.perf_counter() - t1
+    return report
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .image_gen import CardSpec, asset_cache, render_card
+
+log = logging.getLogger("ballsdex.core.image_generator.render_service")
+
+render_queue_depth = Gauge("card_render_queue_depth", "Number of cards waiting for or being rendered")
+render_time = Histogram("card_render_seconds", "Time taken to render a card, including the wait in queue")
+render_failures = Counter("card_render_failures", "Card renders that did not complete", ["reason"])
+asset_cache_requests = Counter("card_asset_cache_requests", "Lookups of decoded card assets", ["result"])
+asset_cache_evictions = Counter("card_asset_cache_evictions", "Decoded card assets evicted from memory")
+
+
+def render_in_worker(spec: CardSpec) -> tuple[bytes, tuple[int, int, int]]:
+    """
+    Render a card and return it with the asset cache statistics of the rendering process, since
+    the metrics of child processes are not exported.
+    """
+    return render_card(spec), asset_cache.take_stats()
+
+
+class RenderError(RuntimeError):
+    """
+    User-facing exceptions while rendering a card.
+    """
+
+    msg = "An error occured while generating the card. Contact support if this persists."
+
+
+class RenderQueueFull(RenderError):
+    """
+    Too many cards are already waiting to be rendered.
+    """
+
+    msg = "Too many cards are being generated right now, please try again in a few seconds."
+
+
+class RenderTimeout(RenderError):
+    """
+    The card took longer than the configured timeout to be rendered.
+    """
+
+    msg = "Generating the card took too long, please try again in a few seconds."
+
+
+class RenderService:
+    """
+    A long-lived pool of processes rendering cards, keeping the Pillow work away from the event
+    loop and its GIL.
+
+    Up to `workers` cards are rendered at the same time, up to `max_queue` requests may wait
+    for a free worker, and further requests are rejected with `RenderQueueFull`.
+
+    Parameters
+    ----------
+    workers: int
+        Number of processes to start. If `0`, cards are rendered in a thread of the current
+        process instead.
+    max_queue: int
+        Maximum number of requests waiting for a worker.
+    timeout: float
+        Maximum number of seconds a request can take, queue included.
+    """
+
+    def __init__(self, workers: int, max_queue: int, timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pool: Executor | None = None
+        self.semaphore = asyncio.Semaphore(max(workers, 1))
+        self.pending = 0
+
+    def start(self):
+        if self.workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            log.info(f"Started card rendering with {self.workers} processes.")
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def _release(self, future: asyncio.Future[tuple[bytes, tuple[int, int, int]]]):
+        self.semaphore.release()
+        # retrieve the exception of renders abandoned after a timeout, to not log it as unhandled
+        if future.cancelled() or future.exception():
+            return
+        _, (hits, misses, evictions) = future.result()
+        asset_cache_requests.labels(result="hit").inc(hits)
+        asset_cache_requests.labels(result="miss").inc(misses)
+        asset_cache_evictions.inc(evictions)
+
+    async def _run(self, spec: CardSpec) -> bytes:
+        await self.semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        future = loop.run_in_executor(pool, render_in_worker, spec)
+        # a worker cannot be interrupted, keep its slot until it is done even if the request timed
+        # out, otherwise more renders than workers would be running
+        future.add_done_callback(self._release)
+        try:
+            data, _ = await asyncio.shield(future)
+            return data
+        except BrokenProcessPool as e:
+            # a worker died (killed by the OOM killer for instance), the pool cannot be reused
+            render_failures.labels(reason="broken").inc()
+            # all the renders in flight fail together, only the first one restarts the pool
+            if self.pool is pool:
+                log.error("Card rendering process pool is broken, restarting it", exc_info=e)
+                self.stop()
+                self.start()
+            raise RenderError() from e
+
+    async def render(self, spec: CardSpec) -> bytes:
+        """
+        Render a card and return the encoded image.
+
+        Raises
+        ------
+        RenderQueueFull
+            Too many requests are already waiting.
+        RenderTimeout
+            The card was not rendered in time.
+        RenderError
+            The rendering process crashed.
+        """
+        if self.pending >= self.max_queue + max(self.workers, 1):
+            render_failures.labels(reason="queue_full").inc()
+            raise RenderQueueFull()
+
+        self.pending += 1
+        render_queue_depth.set(self.pending)
+        t1 = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._run(spec), timeout=self.timeout)
+        except TimeoutError as e:
+            render_failures.labels(reason="timeout").inc()
+            raise RenderTimeout() from e
+        finally:
+            self.pending -= 1
+            render_queue_depth.set(self.pending)
+            render_time.observe(time.perf_counter() - t1)
@@ -39,16 +39,26 @@ registered_perms: set[str] = set()
 # check that all passed permissions actually exist, otherwise emit a warning
 # this has to be checked in a separate function because decorators are synchronous and cannot access the database
 async def check_perms():
+    perms: set[tuple[str, str]] = set()
     for perm in registered_perms:
         try:
             app_label, codename = perm.split(".")
         except ValueError:
             log.warning(f"Permission name should be in the form app_label.permission_codename, not {perm}.")
             continue
-
-        if not await Permission.objects.filter(codename=codename, content_type__app_label=app_label).aexists():
-            log.warning(f"Permission {perm} does not exist and will be ignored.")
+        perms.add((app_label, codename))
     registered_perms.clear()
+    if not perms:
+        return
+
+    # a single query for all the permissions of the cog
+    existing = Permission.objects.filter(
+        codename__in={x[1] for x in perms}, content_type__app_label__in={x[0] for x in perms}
+    ).values_list("content_type__app_label", "codename")
+    async for perm in existing:
+        perms.discard(perm)
+    for app_label, codename in perms:
+        log.warning(f"Permission {app_label}.{codename} does not exist and will be ignored.")
 
 
 async def get_user_for_check(bot: "BallsDexBot", user: discord.abc.User) -> "bool | User":
@@ -0,0 +1,94 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from cachetools import TTLCache
+from prometheus_client import Counter
+
+from bd_models.models import BallInstance
+from bd_models.notify import PROCESS_ID, Change, publish
+
+log = logging.getLogger("ballsdex.core.utils.owned_balls")
+owned_balls_requests = Counter("owned_balls_cache_requests", "Lookups of the owned balls cache", ["result"])
+
+
+class OwnedBallsCache:
+    """
+    Remember which balls each player owns, to know if a catch completes their collection without
+    querying the database.
+
+    Each player is stored as a bitset in an integer, where the bit `n` is set if the player owns
+    at least one instance of the ball with ID `n`. Players are loaded lazily with a single query.
+
+    Adding a ball to a player is cheap, but removing one requires knowing if another instance is
+    left, so the players losing balls are forgotten instead and loaded again on their next catch.
+
+    Every change is published to the other clusters, which forget the player (see `CacheSync`).
+    Changes made from the admin panel, or while the notifications are not received, are only
+    picked up once the entry expires.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of players kept in memory.
+    ttl: float
+        Number of seconds after which a player is loaded again from the database.
+    """
+
+    def __init__(self, maxsize: int = 50_000, ttl: float = 30 * 60):
+        self.players: TTLCache[int, int] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def owns(self, player_id: int, ball_id: int) -> bool:
+        """
+        Return whether the player owns at least one instance of the ball.
+        """
+        bits = self.players.get(player_id)
+        if bits is None:
+            owned_balls_requests.labels(result="miss").inc()
+            bits = 0
+            queryset = BallInstance.objects.filter(player_id=player_id).order_by().distinct()
+            async for owned_id in queryset.values_list("ball_id", flat=True):
+                bits |= 1 << owned_id
+            self.players[player_id] = bits
+        else:
+            owned_balls_requests.labels(result="hit").inc()
+        return bool(bits >> ball_id & 1)
+
+    async def add(self, player_id: int, ball_id: int):
+        """
+        Mark a ball as owned by the player, if the player is loaded.
+        """
+        bits = self.players.get(player_id)
+        if bits is not None:
+            self.players[player_id] = bits | 1 << ball_id
+        await self.publish(player_id)
+
+    async def forget(self, *player_ids: int):
+        """
+        Drop players whose balls were given, traded or deleted.
+        """
+        self.discard(*player_ids)
+        await self.publish(*player_ids)
+
+    def discard(self, *player_ids: int):
+        """
+        Drop players from this process only, after a change published by another process.
+        """
+        for player_id in player_ids:
+            self.players.pop(player_id, None)
+
+    async def publish(self, *player_ids: int):
+        def publish_all():
+            for player_id in player_ids:
+                publish(Change(model="ownedballs", pk=player_id, deleted=False, discord_id=None, origin=PROCESS_ID))
+
+        try:
+            await sync_to_async(publish_all)()
+        except Exception:
+            # the other clusters will pick up the change once their entry expires
+            log.warning(f"Failed to publish the owned balls change of {player_ids}", exc_info=True)
+
+    def clear(self):
+        self.players.clear()
+
+
+owned_balls = OwnedBallsCache()
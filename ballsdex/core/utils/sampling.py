@@ -0,0 +1,75 @@
+import math
+import random
+from typing import Iterable
+
+
+class WeightedSampler[T]:
+    """
+    Pick random items according to their weights in constant time, using Vose's alias method.
+
+    The tables are built once, then each draw costs a single call to `random.random`, unlike
+    `random.choices` which rebuilds the cumulative weights on every call. Samplers are immutable,
+    rebuild a new one and swap the reference to change the weights.
+
+    Parameters
+    ----------
+    items: Iterable[T]
+        The population to pick from.
+    weights: Iterable[float]
+        The relative weight of each item, negative values are treated as `0`.
+
+    Raises
+    ------
+    ValueError
+        The number of weights does not match the number of items.
+    """
+
+    __slots__ = ("items", "probabilities", "aliases")
+
+    def __init__(self, items: Iterable[T], weights: Iterable[float]):
+        self.items: tuple[T, ...] = tuple(items)
+        scaled = [max(float(x), 0.0) for x in weights]
+        if len(scaled) != len(self.items):
+            raise ValueError("The number of weights does not match the number of items")
+
+        total = math.fsum(scaled)
+        if total <= 0:
+            # nothing can be picked, same as random.choices refusing the population
+            self.items = ()
+            scaled = []
+        count = len(self.items)
+        self.probabilities = [1.0] * count
+        self.aliases = list(range(count))
+
+        scaled = [x * count / total for x in scaled]
+        small = [i for i, x in enumerate(scaled) if x < 1]
+        large = [i for i, x in enumerate(scaled) if x >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # leftovers are only caused by rounding errors and are all close to 1
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self) -> T:
+        """
+        Pick a random item.
+
+        Raises
+        ------
+        IndexError
+            The population is empty or all weights are zero.
+        """
+        count = len(self.items)
+        if not count:
+            raise IndexError("Cannot sample from an empty population")
+        value = random.random() * count
+        index = min(int(value), count - 1)
+        if value - index < self.probabilities[index]:
+            return self.items[index]
+        return self.items[self.aliases[index]]
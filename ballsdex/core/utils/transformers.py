@@ -7,7 +7,8 @@ import logging
 import time
 from datetime import timedelta
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Iterable
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable
+from weakref import WeakSet
 
 import discord
 from discord import app_commands
@@ -233,17 +234,46 @@ class TTLModelTransformer[T: "Model"](ModelTransformer[T]):
     ----------
     ttl: float
         Delay in seconds for `items` to live until refreshed with `load_items`, defaults to 300
+    live: bool
+        Whether changes are applied as they are notified with `apply_change`. If so, `items`
+        are only loaded once and do not expire.
     """
 
     ttl: float = 300
+    live: ClassVar[bool] = False
+    instances: ClassVar["WeakSet[TTLModelTransformer]"] = WeakSet()
 
     def __init__(self, **filters: Any):
         super().__init__(**filters)
         self.items: dict[int, T] = {}
         self.search_map: dict[T, str] = {}
         self.last_refresh: float = 0
+        TTLModelTransformer.instances.add(self)
         log.debug(f"Inited transformer for {self.name}")
 
+    @classmethod
+    async def apply_change(cls, model: type[Model], pk: int):
+        """
+        Update the loaded transformers of this model after a row was saved or deleted.
+        """
+        for transformer in list(cls.instances):
+            if transformer.model is not model or not transformer.last_refresh:
+                continue
+            if old := transformer.items.pop(pk, None):
+                transformer.search_map.pop(old, None)
+            # the filters of each transformer may exclude the new version of the row
+            if item := await transformer.get_queryset().filter(pk=pk).afirst():
+                transformer.items[pk] = item
+                transformer.search_map[item] = transformer.key(item).lower()
+
+    @classmethod
+    def invalidate_all(cls):
+        """
+        Reload every transformer on their next use.
+        """
+        for transformer in cls.instances:
+            transformer.last_refresh = 0
+
     async def load_items(self) -> Iterable[T]:
         """
         Query values to fill `items` with.
@@ -252,7 +282,7 @@ class TTLModelTransformer[T: "Model"](ModelTransformer[T]):
 
     async def maybe_refresh(self):
         t = time.time()
-        if t - self.last_refresh > self.ttl:
+        if not self.last_refresh or (not self.live and t - self.last_refresh > self.ttl):
             self.items = {x.pk: x for x in await self.load_items()}
             self.last_refresh = t
             self.search_map = {x: self.key(x).lower() for x in self.items.values()}
@@ -14,6 +14,7 @@ from django.urls import reverse
 from ballsdex.core.bot import BallsDexBot
 from ballsdex.core.utils import checks
 from ballsdex.core.utils.buttons import ConfirmChoiceView
+from ballsdex.core.utils.owned_balls import owned_balls
 from bd_models.models import Ball, BallInstance, Player, Special, Trade, TradeObject
 from settings.models import settings
 
@@ -182,6 +183,7 @@ async def give(ctx: commands.Context[BallsDexBot], user: discord.User, *, flags:
         ),
         special=flags.special,
     )
+    await owned_balls.add(player.pk, flags.countryball.pk)
     await ctx.send(
         f"`{flags.countryball.country}` (`{instance.pk:0X}`) "
         f"{settings.collectible_name} was successfully given to "
@@ -264,6 +266,7 @@ async def balls_delete(ctx: commands.Context[BallsDexBot], countryball_id: str,
     except BallInstance.DoesNotExist:
         await ctx.send(f"The {settings.collectible_name} ID you gave does not exist.", ephemeral=True)
         return
+    await owned_balls.forget(ball.player_id)
     if soft_delete:
         ball.deleted = True
         await ball.asave()
@@ -302,6 +305,8 @@ async def balls_transfer(ctx: commands.Context[BallsDexBot], countryball_id: str
     player, _ = await Player.objects.aget_or_create(discord_id=user.id)
     ball.player = player
     await ball.asave()
+    await owned_balls.forget(original_player.pk)
+    await owned_balls.add(player.pk, ball.ball_id)
 
     trade = await Trade.objects.acreate(player1=original_player, player2=player)
     await TradeObject.objects.acreate(trade=trade, ballinstance=ball, player=original_player)
@@ -365,6 +370,7 @@ async def balls_reset(
             count = await BallInstance.all_objects.filter(player=player).aupdate(deleted=True)
         else:
             count = await BallInstance.all_objects.filter(player=player).adelete()
+    await owned_balls.forget(player.pk)
     await ctx.send(f"{count} {settings.plural_collectible_name} from {user} have been deleted.", ephemeral=True)
     log.info(
         f"{ctx.author} deleted {percentage or 100}% of {player}'s {settings.plural_collectible_name}.",
@@ -11,6 +11,7 @@ from django.db.models import Count, Exists, F, OuterRef, Q
 from ballsdex.core.discord import View
 from ballsdex.core.utils.buttons import ConfirmChoiceView
 from ballsdex.core.utils.menus import ChunkedListSource, Menu, SelectFormatter, TextFormatter, TextSource
+from ballsdex.core.utils.owned_balls import owned_balls
 from ballsdex.core.utils.sorting import FilteringChoices, SortingChoices, filter_balls, sort_balls
 from ballsdex.core.utils.transformers import (
     BallEnabledTransform,
@@ -71,6 +72,8 @@ class DonationRequest(View):
         self.countryball.trade_player = self.countryball.player
         self.countryball.player = self.new_player
         await self.countryball.asave()
+        await owned_balls.forget(self.countryball.trade_player.pk)
+        await owned_balls.add(self.new_player.pk, self.countryball.ball_id)
         trade = await Trade.objects.acreate(player1=self.countryball.trade_player, player2=self.new_player)
         await TradeObject.objects.acreate(
             trade=trade, ballinstance=self.countryball, player=self.countryball.trade_player
@@ -22,7 +22,8 @@ class CountryballsViewer(LayoutView):
     async def selected(self, interaction: discord.Interaction["BallsDexBot"], select: Select):
         await interaction.response.defer(thinking=True)
         ball = await BallInstance.objects.prefetch_related("trade_player").aget(pk=select.values[0])
-        content, file, view = await ball.prepare_for_message(interaction)
+        # browsing only needs a glance at the card, a compact render is much cheaper
+        content, file, view = await ball.prepare_for_message(interaction, scale=2)
         await interaction.followup.send(content=content, file=file, view=view)
         file.close()
 
@@ -1,6 +1,10 @@
 from typing import TYPE_CHECKING
 
+from bd_models.models import balls
+
+from .assets import wild_cards
 from .cog import CountryBallsSpawner
+from .countryball import spawn_samplers
 
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
@@ -10,3 +14,5 @@ async def setup(bot: "BallsDexBot"):
     cog = CountryBallsSpawner(bot)
     await bot.add_cog(cog)
     await cog.load_cache()
+    spawn_samplers.load()
+    await wild_cards.load(balls.values())
@@ -71,6 +71,18 @@ class ABSpawner(BaseSpawnManager):
             msg = manager.__class__.__name__
         return result, msg
 
+    def forget_guild(self, guild_id: int):
+        self.manager_a.forget_guild(guild_id)
+        self.manager_b.forget_guild(guild_id)
+
+    async def save_state(self):
+        await self.manager_a.save_state()
+        await self.manager_b.save_state()
+
+    async def restore_state(self):
+        await self.manager_a.restore_state()
+        await self.manager_b.restore_state()
+
     async def admin_explain(self, ctx: "Context[BallsDexBot]", guild: "discord.Guild"):
         manager = self.get_manager(guild)
         await manager.admin_explain(ctx, guild)
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+import string
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+import discord
+from django.conf import settings as django_settings
+from django.utils import timezone
+from prometheus_client import Counter, Gauge
+from yarl import URL
+
+from bd_models.models import Ball
+from settings.models import settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.packages.countryballs.assets")
+spawn_asset_uploads = Counter("spawn_asset_uploads", "Wild card uploads to the asset channel", ["result"])
+wild_card_store_bytes = Gauge("wild_card_store_bytes", "Size of the wild cards kept in memory")
+wild_card_store_requests = Counter("wild_card_store_requests", "Lookups of wild cards kept in memory", ["result"])
+
+# Discord signs attachment URLs for 24 hours, refresh them a bit before expiry
+DEFAULT_URL_LIFETIME = timedelta(hours=24)
+URL_REFRESH_MARGIN = timedelta(hours=1)
+
+
+def random_file_name(ball: Ball) -> str:
+    """
+    Return a random file name for the ball's wild card, preventing users from reading the name
+    of the spawned ball in the file name.
+    """
+    source = string.ascii_uppercase + string.ascii_lowercase + string.ascii_letters
+    extension = ball.wild_card.name.split(".")[-1]
+    return f"nt_{''.join(random.choices(source, k=15))}.{extension}"
+
+
+def get_url_expiry(url: str) -> datetime:
+    # signed CDN URLs include their expiration as a hexadecimal timestamp in the "ex" parameter
+    try:
+        return datetime.fromtimestamp(int(URL(url).query["ex"], 16), tz=timezone.get_current_timezone())
+    except (KeyError, ValueError):
+        return timezone.now() + DEFAULT_URL_LIFETIME
+
+
+class WildCardStore:
+    """
+    The wild card of every enabled ball kept in memory as immutable bytes, to spawn without
+    reading the media folder.
+
+    Entries are checked against the ball's current wild card name, and read again if it changed.
+
+    Parameters
+    ----------
+    max_size: int
+        Maximum number of bytes kept in memory. Wild cards over this limit are read from disk.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.files: dict[int, tuple[str, bytes]] = {}
+        self.size = 0
+
+    def _store(self, ball: Ball, data: bytes) -> bool:
+        previous = self.files.pop(ball.pk, None)
+        if previous:
+            self.size -= len(previous[1])
+        if self.size + len(data) > self.max_size:
+            return False
+        self.files[ball.pk] = (ball.wild_card.name, data)
+        self.size += len(data)
+        return True
+
+    async def load(self, balls: Iterable[Ball]):
+        """
+        Replace the content of the store with the wild cards of the given enabled balls, reusing
+        the entries that did not change.
+        """
+        previous = self.files
+        self.files = {}
+        self.size = 0
+        for ball in balls:
+            if not ball.enabled:
+                continue
+            if (entry := previous.get(ball.pk)) and entry[0] == ball.wild_card.name:
+                data = entry[1]
+            else:
+                try:
+                    data = await asyncio.to_thread(Path(ball.wild_card.path).read_bytes)
+                except OSError:
+                    log.warning(f"Failed to read the wild card of {ball.country}", exc_info=True)
+                    continue
+            if not self._store(ball, data):
+                log.warning(
+                    f"Wild card store is full ({self.size} bytes), the remaining wild cards will be read from disk."
+                )
+                break
+        wild_card_store_bytes.set(self.size)
+        log.info(f"Loaded {len(self.files)} wild cards in memory ({self.size / 1024 / 1024:.1f} MiB).")
+
+    async def get_file(self, ball: Ball) -> discord.File:
+        """
+        Return a `discord.File` of the ball's wild card with a random name.
+        """
+        if (entry := self.files.get(ball.pk)) and entry[0] == ball.wild_card.name:
+            wild_card_store_requests.labels(result="hit").inc()
+            data = entry[1]
+        else:
+            wild_card_store_requests.labels(result="miss").inc()
+            data = await asyncio.to_thread(Path(ball.wild_card.path).read_bytes)
+            if ball.enabled:
+                self._store(ball, data)
+                wild_card_store_bytes.set(self.size)
+        # BytesIO shares the buffer of immutable bytes until written to
+        return discord.File(BytesIO(data), filename=random_file_name(ball))
+
+
+@dataclass
+class SpawnAsset:
+    url: str
+    expires_at: datetime
+    wild_card: str
+    message: discord.Message
+
+
+class SpawnAssetCache:
+    """
+    Wild cards uploaded once to the asset channel configured in settings, so that spawns can show
+    their CDN URL in an embed instead of uploading the file every time.
+
+    The upload of a ball is reused by all of its spawns until its signed URL is about to expire,
+    then uploaded again and the previous message deleted. This trades the random file names for
+    bandwidth: the URL stays the same for each ball during a day, so players who noted it can
+    recognize the ball without reading the card.
+    """
+
+    def __init__(self):
+        self.assets: dict[int, SpawnAsset] = {}
+        self.uploads: dict[int, asyncio.Task[None]] = {}
+
+    def _get_valid(self, ball: Ball) -> str | None:
+        asset = self.assets.get(ball.pk)
+        if asset is None or asset.wild_card != ball.wild_card.name:
+            return None
+        if asset.expires_at - URL_REFRESH_MARGIN <= timezone.now():
+            return None
+        return asset.url
+
+    def get_url(self, bot: "BallsDexBot", ball: Ball) -> str | None:
+        """
+        Return the CDN URL of the uploaded wild card of the ball. If there is none, or it is about
+        to expire, it is uploaded again in the background.
+
+        Returns
+        -------
+        str | None
+            The URL, or `None` if no asset channel is configured or no upload is ready yet, in
+            which case the file must be sent directly.
+        """
+        if not settings.spawn_asset_channel_id:
+            return None
+        url = self._get_valid(ball)
+        if url is None and ball.pk not in self.uploads:
+            task = asyncio.create_task(self.upload(bot, ball))
+            self.uploads[ball.pk] = task
+            task.add_done_callback(lambda _: self.uploads.pop(ball.pk, None))
+        return url
+
+    async def upload(self, bot: "BallsDexBot", ball: Ball):
+        channel = bot.get_channel(settings.spawn_asset_channel_id or 0)
+        if not isinstance(channel, discord.TextChannel):
+            log.warning(f"Spawn asset channel {settings.spawn_asset_channel_id} not found.")
+            return
+        try:
+            message = await channel.send(f"{ball.country} (ID: {ball.pk})", file=await wild_cards.get_file(ball))
+        except (discord.HTTPException, OSError):
+            log.error(f"Failed to upload the wild card of {ball.country} to the asset channel", exc_info=True)
+            spawn_asset_uploads.labels(result="failed").inc()
+            return
+
+        url = message.attachments[0].url
+        previous = self.assets.get(ball.pk)
+        self.assets[ball.pk] = SpawnAsset(url, get_url_expiry(url), ball.wild_card.name, message)
+        spawn_asset_uploads.labels(result="success").inc()
+        if previous is not None:
+            try:
+                await previous.message.delete()
+            except discord.HTTPException:
+                log.warning(f"Failed to delete the previous upload of {ball.country}", exc_info=True)
+
+
+wild_cards = WildCardStore(getattr(django_settings, "WILD_CARD_STORE_MEMORY_SIZE", 128 * 1024 * 1024))
+spawn_assets = SpawnAssetCache()
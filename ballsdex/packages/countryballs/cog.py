@@ -3,12 +3,13 @@ import logging
 from typing import TYPE_CHECKING, cast
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from bd_models.models import GuildConfig
+from bd_models.models import GuildConfig, balls
 from settings.models import settings
 
-from .countryball import BallSpawnView
+from .assets import wild_cards
+from .countryball import BallSpawnView, spawn_samplers
 from .spawn import BaseSpawnManager
 
 if TYPE_CHECKING:
@@ -32,6 +33,21 @@ class CountryBallsSpawner(commands.Cog):
         spawn_manager = getattr(module, class_name)
         self.spawn_manager = spawn_manager(bot)
 
+    async def cog_load(self):
+        # only the messages of guilds with a spawn channel are parsed from now on
+        self.bot.message_guilds = self.cache
+        await self.spawn_manager.restore_state()
+        self.save_spawn_state.start()
+
+    async def cog_unload(self):
+        self.bot.message_guilds = None
+        self.save_spawn_state.cancel()
+        await self.spawn_manager.save_state()
+
+    @tasks.loop(minutes=5)
+    async def save_spawn_state(self):
+        await self.spawn_manager.save_state()
+
     async def load_cache(self):
         i = 0
         async for config in GuildConfig.objects.filter(enabled=True, spawn_channel__isnull=False).only(
@@ -42,6 +58,18 @@ class CountryBallsSpawner(commands.Cog):
         grammar = "" if i == 1 else "s"
         log.info(f"Loaded {i} guild{grammar} in cache.")
 
+    @commands.Cog.listener()
+    async def on_ballsdex_cache_loaded(self):
+        spawn_samplers.load()
+        await wild_cards.load(balls.values())
+
+    @commands.Cog.listener()
+    async def on_ballsdex_cache_update(self, model: str, pk: int):
+        if model in ("ball", "special"):
+            spawn_samplers.load()
+        if model == "ball":
+            await wild_cards.load(balls.values())
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if message.author.bot or message.webhook_id is not None:
@@ -91,5 +119,11 @@ class CountryBallsSpawner(commands.Cog):
         else:
             if enabled is False:
                 del self.cache[guild.id]
+                self.spawn_manager.forget_guild(guild.id)
             elif channel:
                 self.cache[guild.id] = channel.id
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        # the spawn channel is kept in cache, the guild may invite the bot again
+        self.spawn_manager.forget_guild(guild.id)
@@ -3,8 +3,7 @@ from __future__ import annotations
 import logging
 import math
 import random
-import string
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 import discord
@@ -13,10 +12,14 @@ from django.utils import timezone
 
 from ballsdex.core.discord import Modal, View
 from ballsdex.core.metrics import caught_balls
+from ballsdex.core.utils.owned_balls import owned_balls
+from ballsdex.core.utils.sampling import WeightedSampler
 from ballsdex.core.utils.utils import can_mention
 from bd_models.models import Ball, BallInstance, Player, Special, Trade, TradeObject, balls, specials
 from settings.models import PromptMessage, settings
 
+from .assets import spawn_assets, wild_cards
+
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
@@ -85,6 +88,72 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
         await interaction.followup.edit_message(self.view.message.id, view=self.view)
 
 
+class SpawnSamplers:
+    """
+    Weighted samplers for the random countryballs and special events, built from the cache once
+    it is loaded instead of on every spawn and catch.
+
+    The special sampler only holds the events running when it was built, and is rebuilt once the
+    next event starts or ends.
+    """
+
+    def __init__(self):
+        self.balls: WeightedSampler[Ball] | None = None
+        self.specials: WeightedSampler[Special | None] | None = None
+        self.specials_expiry: datetime | None = None
+
+    def load(self):
+        """
+        Rebuild all samplers from the current cache.
+        """
+        population = [x for x in balls.values() if x.enabled]
+        self.balls = WeightedSampler(population, (x.rarity for x in population))
+        self.load_specials()
+
+    def load_specials(self):
+        now = timezone.now()
+        population: list[Special | None] = []
+        boundaries: list[datetime] = []
+        for special in specials.values():
+            if special.start_date and special.start_date > now:
+                boundaries.append(special.start_date)
+            elif not special.end_date or special.end_date >= now:
+                population.append(special)
+                if special.end_date:
+                    # the end date is inclusive
+                    boundaries.append(special.end_date + timedelta(microseconds=1))
+
+        self.specials_expiry = min(boundaries, default=None)
+        if not population:
+            # no event running, spawns are common without drawing a random number
+            self.specials = WeightedSampler((), ())
+            return
+        weights = [x.rarity for x in population if x]
+        # None is added representing the common countryball
+        population.append(None)
+        weights.append(max(1 - sum(weights), 0))
+        self.specials = WeightedSampler(population, weights)
+
+    def get_random_ball(self) -> Ball:
+        if self.balls is None:
+            self.load()
+        assert self.balls is not None
+        if not self.balls:
+            raise RuntimeError("No ball to spawn")
+        return self.balls.sample()
+
+    def get_random_special(self) -> Special | None:
+        if self.specials is None or (self.specials_expiry and timezone.now() >= self.specials_expiry):
+            self.load_specials()
+        assert self.specials is not None
+        if not self.specials:
+            return None
+        return self.specials.sample()
+
+
+spawn_samplers = SpawnSamplers()
+
+
 class BallSpawnView(View):
     """
     BallSpawnView is a Discord UI view that represents the spawning and interaction logic for a
@@ -182,12 +251,7 @@ class BallSpawnView(View):
         """
         Get a new instance with a random countryball. Rarity values are taken into account.
         """
-        countryballs = list(filter(lambda m: m.enabled, balls.values()))
-        if not countryballs:
-            raise RuntimeError("No ball to spawn")
-        rarities = [x.rarity for x in countryballs]
-        cb = random.choices(population=countryballs, weights=rarities, k=1)[0]
-        return cls(bot, cb)
+        return cls(bot, spawn_samplers.get_random_ball())
 
     @property
     def name(self):
@@ -195,28 +259,7 @@ class BallSpawnView(View):
 
     @staticmethod
     def get_random_special() -> Special | None:
-        population = [
-            x
-            for x in specials.values()
-            # handle null start/end dates with infinity times
-            if (x.start_date or datetime.min.replace(tzinfo=timezone.get_current_timezone()))
-            <= timezone.now()
-            <= (x.end_date or datetime.max.replace(tzinfo=timezone.get_current_timezone()))
-        ]
-
-        if not population:
-            return None
-
-        common_weight: float = 1 - sum(x.rarity for x in population)
-
-        if common_weight < 0:
-            common_weight = 0
-
-        weights = [x.rarity for x in population] + [common_weight]
-        # None is added representing the common countryball
-        special: Special | None = random.choices(population=population + [None], weights=weights, k=1)[0]
-
-        return special
+        return spawn_samplers.get_random_special()
 
     async def spawn(self, channel: discord.TextChannel) -> bool:
         """
@@ -226,7 +269,8 @@ class BallSpawnView(View):
         ----------
         channel: discord.TextChannel
             The channel where to spawn the countryball. Must have permission to send messages
-            and upload files as a bot (not through interactions).
+            and upload files (or embed links, if an uploaded wild card is ready) as a bot (not
+            through interactions).
 
         Returns
         -------
@@ -234,16 +278,12 @@ class BallSpawnView(View):
             `True` if the operation succeeded, otherwise `False`. An error will be displayed
             in the logs if that's the case.
         """
-
-        def generate_random_name():
-            source = string.ascii_uppercase + string.ascii_lowercase + string.ascii_letters
-            return "".join(random.choices(source, k=15))
-
-        extension = self.model.wild_card.name.split(".")[-1]
-        file_name = f"nt_{generate_random_name()}.{extension}"
         try:
             permissions = channel.permissions_for(channel.guild.me)
-            if permissions.attach_files and permissions.send_messages:
+            url = None
+            if permissions.send_messages and permissions.embed_links:
+                url = spawn_assets.get_url(self.bot, self.model)
+            if permissions.send_messages and (url or permissions.attach_files):
                 spawn_message = settings.get_random_message(PromptMessage.PromptType.SPAWN).format(
                     collectible=settings.collectible_name,
                     ball=self.name,
@@ -251,9 +291,12 @@ class BallSpawnView(View):
                     emoji=self.bot.get_emoji(self.model.emoji_id),
                 )
 
-                self.message = await channel.send(
-                    spawn_message, view=self, file=discord.File(self.model.wild_card.path, filename=file_name)
-                )
+                if url:
+                    embed = discord.Embed().set_image(url=url)
+                    self.message = await channel.send(spawn_message, view=self, embed=embed)
+                else:
+                    file = await wild_cards.get_file(self.model)
+                    self.message = await channel.send(spawn_message, view=self, file=file)
                 return True
             else:
                 log.warning("Missing permission to spawn ball in channel %s.", channel)
@@ -327,7 +370,7 @@ class BallSpawnView(View):
         self.catch_button.disabled = True
         caught_time = timezone.now()
         player = player or (await Player.objects.aget_or_create(discord_id=user.id))[0]
-        is_new = not await BallInstance.objects.filter(player=player, ball=self.model).aexists()
+        is_new = not await owned_balls.owns(player.pk, self.model.pk)
 
         if self.ballinstance:
             # if specified, do not create a countryball but switch owner
@@ -340,6 +383,8 @@ class BallSpawnView(View):
             self.ballinstance.player = player
             self.ballinstance.locked = None  # type: ignore
             await self.ballinstance.asave(update_fields=("player", "trade_player", "locked"))
+            await owned_balls.forget(self.ballinstance.trade_player.pk)
+            await owned_balls.add(player.pk, self.model.pk)
             return self.ballinstance, is_new
 
         # stat may vary by +/- 20% of base stat
@@ -370,6 +415,7 @@ class BallSpawnView(View):
             spawned_time=self.message.created_at,
             catch_date=caught_time,
         )
+        await owned_balls.add(player.pk, self.model.pk)
 
         # logging and stats
         log.log(
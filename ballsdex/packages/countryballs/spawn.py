@@ -1,14 +1,24 @@
 import asyncio
+import itertools
 import logging
+import math
 import random
+import struct
+import sys
+import time
 from abc import abstractmethod
-from collections import deque, namedtuple
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import TYPE_CHECKING, Literal
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Literal, Mapping
 
 import discord
+from cachetools import TTLCache
 from discord.utils import format_dt
+from django.conf import settings as django_settings
+from prometheus_client import Gauge
 
 from settings.models import settings
 
@@ -18,8 +28,78 @@ if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
 log = logging.getLogger("ballsdex.packages.countryballs")
+tracked_guilds = Gauge("spawn_tracked_guilds", "Number of guilds with a spawn cooldown in memory", ["manager"])
+tracked_guilds_memory = Gauge("spawn_tracked_guilds_bytes", "Estimated memory used by the spawn cooldowns", ["manager"])
 
-CachedMessage = namedtuple("CachedMessage", ["content", "author_id"])
+
+class MessageWindow:
+    """
+    A ring buffer of the authors and content lengths of the most recent messages in a guild,
+    with the number of messages per author maintained on insertion, making every check O(1).
+
+    Parameters
+    ----------
+    maxlen: int
+        Number of messages to keep.
+    """
+
+    __slots__ = ("maxlen", "authors", "lengths", "index", "count", "author_counts", "short_messages")
+
+    def __init__(self, maxlen: int = 100):
+        self.maxlen = maxlen
+        self.authors = array("Q", bytes(8 * maxlen))
+        # lengths are only compared to small values, capped to fit in 16 bits
+        self.lengths = array("H", bytes(2 * maxlen))
+        self.index = 0
+        self.count = 0
+        self.author_counts: dict[int, int] = {}
+        self.short_messages = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, author_id: int, length: int):
+        if self.count == self.maxlen:
+            # evict the oldest message, which is about to be overwritten
+            old_author = self.authors[self.index]
+            if (remaining := self.author_counts[old_author] - 1) > 0:
+                self.author_counts[old_author] = remaining
+            else:
+                del self.author_counts[old_author]
+            if self.lengths[self.index] < 5:
+                self.short_messages -= 1
+        else:
+            self.count += 1
+
+        self.authors[self.index] = author_id
+        self.lengths[self.index] = min(length, 0xFFFF)
+        self.author_counts[author_id] = self.author_counts.get(author_id, 0) + 1
+        if length < 5:
+            self.short_messages += 1
+        self.index = (self.index + 1) % self.maxlen
+
+    @property
+    def distinct_authors(self) -> int:
+        return len(self.author_counts)
+
+    def author_share(self, author_id: int) -> float:
+        """
+        Return the number of messages of this author, relative to the window's capacity.
+        """
+        return self.author_counts.get(author_id, 0) / self.maxlen
+
+    def memory_size(self) -> int:
+        """
+        Return an estimate of the number of bytes used by this window.
+        """
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.authors)
+            + sys.getsizeof(self.lengths)
+            + sys.getsizeof(self.author_counts)
+            # dict values are small cached ints, only the keys are separate objects
+            + sum(sys.getsizeof(x) for x in self.author_counts)
+        )
 
 
 class BaseSpawnManager:
@@ -58,6 +138,31 @@ class BaseSpawnManager:
         """
         raise NotImplementedError
 
+    def forget_guild(self, guild_id: int):
+        """
+        Invoked when a guild is removed or disables spawning, drop any state kept for it.
+
+        Parameters
+        ----------
+        guild_id: int
+            The ID of the guild to forget
+        """
+        pass
+
+    async def save_state(self):
+        """
+        Invoked periodically and when the cog is unloaded (which includes shutdowns), persist the
+        state needed to resume spawning where it stopped.
+        """
+        pass
+
+    async def restore_state(self):
+        """
+        Invoked when the cog is loaded, restore the state saved by `save_state`. This should not
+        slow down the startup, consider restoring lazily.
+        """
+        pass
+
     @abstractmethod
     async def admin_explain(self, ctx: "Context[BallsDexBot]", guild: discord.Guild):
         """
@@ -90,69 +195,229 @@ class SpawnCooldown:
     threshold: int
         The number `scaled_message_count` has to reach for spawn.
         Determined randomly with `SPAWN_CHANCE_RANGE`
-    lock: asyncio.Lock
-        Used to ratelimit messages and ignore fast spam
-    message_cache: ~collections.deque[CachedMessage]
-        A list of recent messages used to reduce the spawn chance when too few different chatters
-        are present. Limited to the 100 most recent messages in the guild.
+    last_increase: datetime | None
+        Time of the last message that increased the count. Messages sent less than ten seconds
+        after it are ignored, to ratelimit fast spam.
+    message_cache: MessageWindow
+        The authors and lengths of recent messages, used to reduce the spawn chance when too few
+        different chatters are present. Limited to the 100 most recent messages in the guild.
     """
 
     time: datetime
     # initialize partially started, to reduce the dead time after starting the bot
     scaled_message_count: float = field(default_factory=lambda: settings.spawn_chance_min // 2)
     threshold: int = field(default_factory=lambda: random.randint(settings.spawn_chance_min, settings.spawn_chance_max))
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
-    message_cache: deque[CachedMessage] = field(default_factory=lambda: deque(maxlen=100))
+    last_increase: datetime | None = field(default=None, init=False)
+    message_cache: MessageWindow = field(default_factory=lambda: MessageWindow(maxlen=100))
 
     def reset(self, time: datetime):
         self.scaled_message_count = 1.0
         self.threshold = random.randint(settings.spawn_chance_min, settings.spawn_chance_max)
-        try:
-            self.lock.release()
-        except RuntimeError:  # lock is not acquired
-            pass
+        # the ratelimit of the message that spawned still applies, like the lock held during the
+        # 10 seconds sleep did
         self.time = time
 
+    def on_cooldown(self, time: datetime) -> bool:
+        """
+        Whether a message sent at the given time would be ignored by the ratelimit.
+        """
+        return self.last_increase is not None and (time - self.last_increase).total_seconds() < 10
+
+    def memory_size(self) -> int:
+        """
+        Return an estimate of the number of bytes used by this cooldown.
+        """
+        return sys.getsizeof(self) + self.message_cache.memory_size()
+
     async def increase(self, message: discord.Message) -> bool:
-        # this is a deque, not a list
-        # its property is that, once the max length is reached (100 for us),
-        # the oldest element is removed, thus we only have the last 100 messages in memory
-        self.message_cache.append(CachedMessage(content=message.content, author_id=message.author.id))
+        # once the max length is reached (100 for us), the oldest message is overwritten,
+        # thus we only have the last 100 messages in memory
+        self.message_cache.append(message.author.id, len(message.content))
 
-        if self.lock.locked():
+        # at most one increase every 10 seconds
+        if self.on_cooldown(message.created_at):
             return False
-
-        async with self.lock:
-            message_multiplier = 1
-            if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
-                message_multiplier /= 2
-            if message._state.intents.message_content and len(message.content) < 5:
-                message_multiplier /= 2
-            if len(set(x.author_id for x in self.message_cache)) < 4 or (
-                len(list(filter(lambda x: x.author_id == message.author.id, self.message_cache)))
-                / self.message_cache.maxlen  # type: ignore
-                > 0.4
-            ):
-                message_multiplier /= 2
-            self.scaled_message_count += message_multiplier
-            await asyncio.sleep(10)
+        self.last_increase = message.created_at
+
+        message_multiplier = 1
+        if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
+            message_multiplier /= 2
+        if message._state.intents.message_content and len(message.content) < 5:
+            message_multiplier /= 2
+        if self.message_cache.distinct_authors < 4 or self.message_cache.author_share(message.author.id) > 0.4:
+            message_multiplier /= 2
+        self.scaled_message_count += message_multiplier
         return True
 
 
+class CooldownSnapshot:
+    """
+    Spawn cooldowns serialized in a compact binary form, as fixed-size records sorted by guild
+    ID. Lookups are a binary search on the raw bytes, nothing is parsed until a guild is needed.
+
+    The message window is not saved, it fills up again quickly.
+    """
+
+    HEADER = struct.Struct("<4sI")
+    MAGIC = b"BDSC"
+    VERSION = 1
+    # guild ID, start time, last increase time (NaN if none), scaled message count, threshold
+    RECORD = struct.Struct("<QdddI")
+
+    def __init__(self, data: bytes):
+        magic, version = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Unsupported spawn cooldown snapshot")
+        if (len(data) - self.HEADER.size) % self.RECORD.size:
+            raise ValueError("Truncated spawn cooldown snapshot")
+        self.data = memoryview(data)[self.HEADER.size :]
+
+    def __len__(self) -> int:
+        return len(self.data) // self.RECORD.size
+
+    def __getitem__(self, index: int) -> int:
+        # only the guild ID, used by the binary search
+        return struct.unpack_from("<Q", self.data, index * self.RECORD.size)[0]
+
+    @staticmethod
+    def _load(start: float, last_increase: float, scaled_message_count: float, threshold: int) -> SpawnCooldown:
+        cooldown = SpawnCooldown(
+            datetime.fromtimestamp(start, tz=UTC), scaled_message_count=scaled_message_count, threshold=threshold
+        )
+        if not math.isnan(last_increase):
+            cooldown.last_increase = datetime.fromtimestamp(last_increase, tz=UTC)
+        return cooldown
+
+    def get(self, guild_id: int) -> SpawnCooldown | None:
+        index = bisect_left(self, guild_id)
+        if index >= len(self) or self[index] != guild_id:
+            return None
+        _, *record = self.RECORD.unpack_from(self.data, index * self.RECORD.size)
+        return self._load(*record)
+
+    def items(self) -> Iterator[tuple[int, SpawnCooldown]]:
+        for guild_id, *record in self.RECORD.iter_unpack(self.data):
+            yield guild_id, self._load(*record)
+
+    @classmethod
+    def dump(cls, cooldowns: Mapping[int, SpawnCooldown]) -> bytes:
+        buffer = bytearray(cls.HEADER.pack(cls.MAGIC, cls.VERSION))
+        for guild_id, cooldown in sorted(cooldowns.items()):
+            buffer += cls.RECORD.pack(
+                guild_id,
+                cooldown.time.timestamp(),
+                cooldown.last_increase.timestamp() if cooldown.last_increase else math.nan,
+                cooldown.scaled_message_count,
+                cooldown.threshold,
+            )
+        return bytes(buffer)
+
+
 class SpawnManager(BaseSpawnManager):
+    # guilds without messages for this long are forgotten, as if the bot just started
+    cooldown_ttl = 24 * 60 * 60
+    # maximum number of guilds tracked, the least recently active ones are forgotten first
+    max_cooldowns = 100_000
+
     def __init__(self, bot: "BallsDexBot"):
         super().__init__(bot)
-        self.cooldowns: dict[int, SpawnCooldown] = {}
+        self.cooldowns: TTLCache[int, SpawnCooldown] = TTLCache(maxsize=self.max_cooldowns, ttl=self.cooldown_ttl)
+        # labelled by class, A/B testing runs two managers at once
+        tracked_guilds.labels(manager=type(self).__name__).set_function(lambda: len(self.cooldowns))
+        tracked_guilds_memory.labels(manager=type(self).__name__).set_function(self.memory_size)
+
+        self.snapshot: CooldownSnapshot | None = None
+        # guilds of the snapshot that were already restored or forgotten
+        self.snapshot_consumed: set[int] = set()
+
+    def memory_size(self, sample_size: int = 100) -> int:
+        """
+        Return an estimate of the number of bytes used by the cooldowns, extrapolated from a
+        sample of them to keep metric scrapes cheap.
+        """
+        sample = [x.memory_size() for x in itertools.islice(self.cooldowns.values(), sample_size)]
+        if not sample:
+            return sys.getsizeof(self.cooldowns)
+        return sys.getsizeof(self.cooldowns) + sum(sample) * len(self.cooldowns) // len(sample)
+
+    def forget_guild(self, guild_id: int):
+        self.cooldowns.pop(guild_id, None)
+        self.snapshot_consumed.add(guild_id)
+
+    def is_expired(self, cooldown: SpawnCooldown) -> bool:
+        """
+        Whether a cooldown restored from a snapshot was idle for longer than `cooldown_ttl`.
+        """
+        last_activity = max(cooldown.time, cooldown.last_increase or cooldown.time)
+        return (datetime.now(UTC) - last_activity).total_seconds() > self.cooldown_ttl
+
+    @property
+    def state_path(self) -> Path | None:
+        cache_dir = getattr(django_settings, "CACHE_DIR", None)
+        if cache_dir is None:
+            return None
+        # one file per cluster, identified by its first shard, and per manager class since A/B
+        # testing runs two managers at once
+        return Path(cache_dir, f"spawn-cooldowns-{type(self).__name__}-{min(self.bot.shard_ids or [0])}.bin")
+
+    async def save_state(self):
+        if (path := self.state_path) is None:
+            return
+        cooldowns = dict(self.cooldowns.items())
+        if self.snapshot:
+            # keep the guilds that did not send a message since the last restore, until they expire
+            for guild_id, cooldown in self.snapshot.items():
+                if guild_id not in self.snapshot_consumed and not self.is_expired(cooldown):
+                    cooldowns.setdefault(guild_id, cooldown)
+
+        def write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(CooldownSnapshot.dump(cooldowns))
+            tmp.replace(path)
+
+        try:
+            await asyncio.to_thread(write)
+        except OSError:
+            log.warning("Failed to save spawn cooldowns", exc_info=True)
+
+    async def restore_state(self):
+        if (path := self.state_path) is None:
+            return
+        try:
+            # a snapshot older than the TTL only contains expired guilds
+            if time.time() - path.stat().st_mtime > self.cooldown_ttl:
+                return
+            self.snapshot = CooldownSnapshot(await asyncio.to_thread(path.read_bytes))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, struct.error):
+            log.warning("Failed to restore spawn cooldowns", exc_info=True)
+            return
+        log.info(f"Restoring the spawn cooldowns of {len(self.snapshot)} guilds on their next message.")
+
+    def get_cooldown(self, guild_id: int) -> SpawnCooldown | None:
+        cooldown = self.cooldowns.get(guild_id)
+        if cooldown is None and self.snapshot is not None and guild_id not in self.snapshot_consumed:
+            self.snapshot_consumed.add(guild_id)
+            cooldown = self.snapshot.get(guild_id)
+            # records carried over by every save are not expired by the file's age
+            if cooldown and self.is_expired(cooldown):
+                cooldown = None
+            if cooldown:
+                self.cooldowns[guild_id] = cooldown
+        return cooldown
 
     async def handle_message(self, message: discord.Message) -> bool:
         guild = message.guild
         if not guild:
             return False
 
-        cooldown = self.cooldowns.get(guild.id, None)
+        cooldown = self.get_cooldown(guild.id)
         if not cooldown:
             cooldown = SpawnCooldown(message.created_at)
-            self.cooldowns[guild.id] = cooldown
+        # setting the item again refreshes its expiration, only idle guilds expire
+        self.cooldowns[guild.id] = cooldown
 
         delta_t = (message.created_at - cooldown.time).total_seconds()
         # change how the threshold varies according to the member count, while nuking farm servers
@@ -185,7 +450,7 @@ class SpawnManager(BaseSpawnManager):
         return True
 
     async def admin_explain(self, ctx: "Context[BallsDexBot]", guild: discord.Guild):
-        cooldown = self.cooldowns.get(guild.id)
+        cooldown = self.get_cooldown(guild.id)
         if not cooldown:
             await ctx.send(
                 "No spawn manager could be found for that guild. Spawn may have been disabled.", ephemeral=True
@@ -200,9 +465,8 @@ class SpawnManager(BaseSpawnManager):
         embed.set_author(name=guild.name, icon_url=guild.icon.url if guild.icon else None)
         embed.colour = discord.Colour.orange()
 
-        delta = (
-            (ctx.interaction.created_at if ctx.interaction else ctx.message.created_at) - cooldown.time
-        ).total_seconds()
+        now = ctx.interaction.created_at if ctx.interaction else ctx.message.created_at
+        delta = (now - cooldown.time).total_seconds()
         # change how the threshold varies according to the member count, while nuking farm servers
         if guild.member_count < 5:
             multiplier = 0.1
@@ -220,19 +484,13 @@ class SpawnManager(BaseSpawnManager):
         penalities: list[str] = []
         if guild.member_count < 5 or guild.member_count > 1000:
             penalities.append("Server has less than 5 or more than 1000 members")
-        if any(len(x.content) < 5 for x in cooldown.message_cache):
+        if cooldown.message_cache.short_messages:
             penalities.append("Some cached messages are less than 5 characters long")
 
-        authors_set = set(x.author_id for x in cooldown.message_cache)
-        low_chatters = len(authors_set) < 4
+        low_chatters = cooldown.message_cache.distinct_authors < 4
         # check if one author has more than 40% of messages in cache
         major_chatter = any(
-            (
-                len(list(filter(lambda x: x.author_id == author, cooldown.message_cache)))
-                / cooldown.message_cache.maxlen  # type: ignore
-                > 0.4
-            )
-            for author in authors_set
+            cooldown.message_cache.author_share(author) > 0.4 for author in cooldown.message_cache.author_counts
         )
         # this mess is needed since either conditions make up to a single penality
         if low_chatters:
@@ -268,7 +526,7 @@ class SpawnManager(BaseSpawnManager):
         )
 
         informations: list[str] = []
-        if cooldown.lock.locked():
+        if cooldown.on_cooldown(now):
             informations.append("The manager is currently on cooldown.")
         if delta < 600:
             informations.append(
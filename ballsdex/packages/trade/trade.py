@@ -21,6 +21,7 @@ from django.utils import timezone
 from ballsdex.core.discord import UNKNOWN_INTERACTION, Container, LayoutView, Modal
 from ballsdex.core.utils.buttons import ConfirmChoiceView
 from ballsdex.core.utils.menus import CountryballFormatter, Menu, ModelSource, TextFormatter, TextSource
+from ballsdex.core.utils.owned_balls import owned_balls
 from bd_models.enums import TradeCooldownPolicy
 from bd_models.models import BallInstance, Player, Trade, TradeObject
 from settings.models import settings
@@ -697,6 +698,7 @@ class TradeInstance(LayoutView):
         await self.confirmation_lock.acquire()
         self.timeout_task.cancel()
         trade = await sync_to_async(self.perform_trade_operation)()
+        await owned_balls.forget(self.trader1.player.pk, self.trader2.player.pk)
         self.stop()
         # edition of the message will be triggered by the caller
         self.add_item(TextDisplay(f"## The trade has been completed!\n-# ID: `#{trade.pk:0X}`"))